@@ -0,0 +1,237 @@
+"""
+Benchmarks each stage of rendering a kicker or roller.
+
+Runs a matrix of designs and pixels_per_inch, timing geometry, recording the
+grid, curve, rungs, text and frame into the display list, rasterizing it
+(including the canvas, see ramp_base.new_canvas), PNG encode and the S3/DynamoDB save calls. S3 and DynamoDB are replaced by local stand-ins so no
+AWS access is needed. Results are the median over --repeat runs in milliseconds.
+
+python benchmark.py                  # run and compare against the baseline
+python benchmark.py --save           # run and write the baseline
+python benchmark.py --quick          # smaller matrix
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "kicker"))
+
+import ramp_base  # noqa: E402
+from kicker import Kicker, KickerConfig  # noqa: E402
+from roller import Roller, RollerConfig  # noqa: E402
+
+DEFAULT_BASELINE = "bench_baseline.json"
+
+KICKERS = [(35.0, 36.0), (55.0, 72.0), (70.0, 120.0)]  # (angle degrees, height inches)
+ROLLERS = [(96.0, 18.0), (144.0, 24.0)]  # (length inches, height inches)
+PIXELS_PER_INCH = [10, 20, 50]
+
+QUICK_KICKERS = [(55.0, 72.0)]
+QUICK_ROLLERS = [(96.0, 18.0)]
+QUICK_PIXELS_PER_INCH = [20]
+
+
+class LocalS3():
+    """
+    Stands in for the boto3 S3 client and discards what is uploaded.
+    """
+
+    def put_object(self, **kwargs):
+        pass
+
+    def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "local"}
+
+    def upload_part(self, PartNumber, **kwargs):
+        return {"ETag": str(PartNumber)}
+
+    def complete_multipart_upload(self, **kwargs):
+        pass
+
+    def abort_multipart_upload(self, **kwargs):
+        pass
+
+
+class LocalTable():
+    def put_item(self, Item):
+        pass
+
+    def delete_item(self, Key):
+        pass
+
+
+@contextlib.contextmanager
+def local_aws():
+    get_client, get_table = ramp_base.get_client, ramp_base.get_table
+    ramp_base.get_client = lambda name: LocalS3()
+    ramp_base.get_table = lambda name: LocalTable()
+    try:
+        yield
+    finally:
+        ramp_base.get_client, ramp_base.get_table = get_client, get_table
+
+
+def _encode(ramp):
+    ramp.image.save(io.BytesIO(), format="PNG")
+
+
+def kicker_stages(config):
+    state = {}
+
+    def init():
+        state["ramp"] = Kicker(config)
+
+    def grid():
+        ramp = state["ramp"]
+        ramp.display_list = ramp.new_display_list()
+        ramp.render_grid()
+
+    def curve():
+        ramp = state["ramp"]
+        ramp.curve_points, ramp.curve_x, ramp.curve_y = ramp.compute_curve()
+        ramp.display_list.line(ramp.curve_points, fill='black', width=ramp.fill_width)
+
+    def text():
+        ramp = state["ramp"]
+        ramp.add_text([f"{key}: {value}" for key, value in ramp.stats.items()][:5])
+
+    return state, [
+        ("init", init),
+        ("grid", grid),
+        ("curve", curve),
+        ("rungs", lambda: state["ramp"].add_rungs()),
+        ("text", text),
+        ("frame", lambda: state["ramp"].draw_frame()),
+        ("raster", lambda: state["ramp"].rasterize()),
+        ("encode", lambda: _encode(state["ramp"])),
+        ("save_image", lambda: state["ramp"].save_image()),
+        ("save", lambda: state["ramp"].save()),
+    ]
+
+
+def roller_stages(config):
+    state = {}
+
+    def init():
+        state["ramp"] = Roller(config)
+
+    def grid():
+        ramp = state["ramp"]
+        ramp.display_list = ramp.new_display_list()
+        ramp.render_grid()
+
+    def curve():
+        ramp = state["ramp"]
+        ramp.curve_points, ramp.curve_x, ramp.curve_y = ramp.compute_curve()
+        ramp.display_list.line(ramp.curve_points, fill='black', width=ramp.fill_width)
+
+    return state, [
+        ("init", init),
+        ("grid", grid),
+        ("curve", curve),
+        ("rungs", lambda: state["ramp"].add_rungs()),
+        ("text", lambda: state["ramp"].add_text(["Length", "Max Height", "Max Slope"])),
+        ("frame", lambda: state["ramp"].render_frame()),
+        ("raster", lambda: state["ramp"].rasterize()),
+        ("encode", lambda: _encode(state["ramp"])),
+    ]
+
+
+def cases(quick: bool):
+    """
+    Cases are named after the pixels_per_inch fit_resolution settles on, which
+    is lower than asked for when a memory budget applies (in Lambda or with
+    AWS_LAMBDA_FUNCTION_MEMORY_SIZE set), so a clamped run is never compared
+    against a baseline at the full resolution.
+    """
+    kickers = QUICK_KICKERS if quick else KICKERS
+    rollers = QUICK_ROLLERS if quick else ROLLERS
+    ppis = QUICK_PIXELS_PER_INCH if quick else PIXELS_PER_INCH
+    for ppi in ppis:
+        for angle, height in kickers:
+            config = KickerConfig(angle, height_inches=height, pixels_per_inch=ppi)
+            name = f"kicker a{angle:g} h{height:g} ppi{config.pixels_per_inch:g}"
+            yield name, lambda c=config: kicker_stages(c)
+        for length, height in rollers:
+            config = RollerConfig(length, height, pixels_per_inch=ppi)
+            name = f"roller l{length:g} h{height:g} ppi{config.pixels_per_inch:g}"
+            yield name, lambda c=config: roller_stages(c)
+
+
+def run(quick: bool = False, repeat: int = 3) -> dict:
+    results = {}
+    with local_aws():
+        for name, make_stages in cases(quick):
+            samples = {}
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    _, stages = make_stages()
+                total = 0.0
+                for stage, fn in stages:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        fn()
+                        elapsed = (time.perf_counter() - start) * 1000.0
+                    samples.setdefault(stage, []).append(elapsed)
+                    total += elapsed
+                samples.setdefault("total", []).append(total)
+            results[name] = {stage: round(statistics.median(times), 3) for stage, times in samples.items()}
+            print(f"{name:<28} total {results[name]['total']:>10.1f} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, floor_ms: float = 1.0) -> list:
+    """
+    Returns (case, stage, baseline, current) for every stage that got slower
+    than the baseline by more than threshold, ignoring changes under floor_ms.
+    """
+    regressions = []
+    for name, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(name, {}).get(stage)
+            if previous is None:
+                continue
+            if current > previous * (1.0 + threshold) and current - previous > floor_ms:
+                regressions.append((name, stage, previous, current))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slow down, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    results = run(quick=args.quick, repeat=args.repeat)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results
+            }, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save to create one.")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, stage, previous, current in regressions:
+        print(f"REGRESSION {name} {stage}: {previous:.1f} ms -> {current:.1f} ms")
+    if not regressions:
+        print("No regressions")
+    sys.exit(1 if regressions else 0)
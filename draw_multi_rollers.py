@@ -1,10 +1,18 @@
-from roller import RollerConfig, MultiDrawRollers
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "kicker"))
+
+from multi_render import MultiRenderer
+from roller import RollerConfig
 
 configs = [
-    RollerConfig(8 * 12.0, 18.0),
-    RollerConfig(10 * 12.0, 18.0),
-    RollerConfig(12 * 12.0, 18.0),
+    RollerConfig(8 * 12.0, 18.0, pixels_per_inch=20),
+    RollerConfig(10 * 12.0, 18.0, pixels_per_inch=20),
+    RollerConfig(12 * 12.0, 18.0, pixels_per_inch=20),
 ]
 
-roller = MultiDrawRollers(configs)
-roller.draw_image()
+if __name__ == '__main__':
+    renderer = MultiRenderer(configs)
+    results = renderer.render_sheet(os.path.join("output", "rollers.png"), scale=0.25)
+    MultiRenderer.report(results)
@@ -0,0 +1,40 @@
+"""
+Reports cold start import time of the kicker Lambda.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter from the
+kicker/ directory (as Lambda does) and prints the total and the slowest
+modules by cumulative time.
+
+python import_report.py [module] [top]
+"""
+import os
+import subprocess
+import sys
+
+KICKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kicker")
+
+
+def import_times(module: str = "app"):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=KICKER_DIR, capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return times
+
+
+if __name__ == '__main__':
+    module = sys.argv[1] if len(sys.argv) > 1 else "app"
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    times = import_times(module)
+    total = next(t for t in times if t[2].strip() == module)[0]
+    print(f"import {module}: {total / 1000.0:.1f} ms")
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for cumulative, self_us, name in sorted(times, reverse=True)[:top]:
+        print(f"{cumulative / 1000.0:>16.1f} {self_us / 1000.0:>10.1f}  {name}")
@@ -1,7 +1,32 @@
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from math import floor
+from typing import List, Tuple
 
+from design_table import load_table
+from encoders import DEFAULT_FORMAT, ENCODERS, TILED_FORMATS
 from kicker import Kicker, KickerConfig
+from metrics import Metrics
+from ramp_base import batch_create, render_budget
+from ramp_math import kicker_geometry, kicker_stats, kicker_stats_batch
+from raster import load_font
+from render_cache import RenderCache
+from roller import Roller, RollerConfig
+from roller_math import roller_stats
+from solver import QUANTITIES, solve_designs
+from utils import format_float
+
+# Module level so it is shared across warm invocations
+render_cache = RenderCache()
+
+# Limits for batch_handler. A default plan takes ~0.3 s to draw and encode on
+# one core, ~0.6 s on the 1024 MB function's share of a vCPU, so 24 renders
+# and their uploads finish in about 15-20 s, under API Gateway's 29 s.
+MAX_BATCH_RENDERS = 24
+MAX_BATCH_STATS = 10000
+BATCH_WORKERS = 4
+MAX_SOLVE_DESIGNS = 10000
 
 \
 
@@ -24,6 +49,66 @@ def clean_params(params):
     }
 
 
+def clean_format(params):
+    """
+    `json` only returns the stats, anything else is an encoder name (see
+    encoders.py) that the plan is rendered and uploaded as, `png` by default.
+    Tiled templates are only served by template_handler.
+    """
+    output_format = params.get("format", DEFAULT_FORMAT)
+    if output_format in TILED_FORMATS:
+        raise Exception(f"{output_format} is a full scale template, request it from /template")
+    if output_format != "json" and output_format not in ENCODERS:
+        formats = [name for name in ENCODERS if name not in TILED_FORMATS]
+        raise Exception(f"format must be json or one of {', '.join(formats)}. You gave {output_format}")
+    return output_format
+
+
+def expand_range(spec, name: str) -> List[float]:
+    """
+    spec is a single number, a list of numbers or {"start", "stop", "step"}
+    where stop is inclusive.
+    """
+    if spec is None:
+        raise Exception(f"{name} not provided")
+    if isinstance(spec, dict):
+        start = float(spec["start"])
+        stop = float(spec["stop"])
+        step = float(spec.get("step", 1))
+        if step <= 0:
+            raise Exception(f"{name} step must be positive")
+        count = floor((stop - start) / step + 1e-9) + 1
+        return [start + i * step for i in range(count)]
+    if isinstance(spec, list):
+        return [float(v) for v in spec]
+    return [float(spec)]
+
+
+def clean_batch_params(spec) -> List[Tuple[float, float]]:
+    """
+    Returns a list of (angle_degree, height_inches).
+
+    Either an explicit list `designs: [{"angle", "height"}]` or the cross product
+    of `angles` and `heights`, heights in feet.
+    """
+    if spec.get("designs"):
+        return [(float(d["angle"]), float(d["height"]) * 12.0) for d in spec["designs"]]
+
+    angles = expand_range(spec.get("angles"), "angles")
+    heights = expand_range(spec.get("heights"), "heights")
+    return [(angle, height * 12.0) for angle in angles for height in heights]
+
+
+def render_kicker(config: KickerConfig, key: str) -> dict:
+    """
+    Draws and uploads one kicker, safe to run in a worker thread.
+    """
+    kicker = Kicker(config)
+    kicker.draw_image()
+    kicker.save_image()
+    return {**kicker.stats, "id": key}
+
+
 def lambda_handler(event, context):
     """Sample pure Lambda function
 
@@ -46,26 +131,280 @@ def lambda_handler(event, context):
         Return doc: https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html
     """
 
-    print(f"event {event['queryStringParameters'].keys()}")
-    params = clean_params(event["queryStringParameters"])
+    metrics = Metrics(Function="kicker")
+    try:
+        with metrics.timer("total"):
+            return handle_kicker(event["queryStringParameters"], metrics)
+    finally:
+        metrics.emit()
 
-    config = KickerConfig(**params)
-    kicker = Kicker(config)
-    print("Creating image")
-    kicker.draw_image()
 
-    
-    url = kicker.save_image()
-    print(f"Saved to S3 {url}")
+def handle_kicker(query, metrics: Metrics):
+    params = clean_params(query)
+    if params["debug"]:
+        print(f"event {query.keys()}")
+
+    output_format = clean_format(query)
+    if output_format == "json":
+        # Stats only, no image is allocated, uploaded or saved.
+        metrics.put_property("path", "json")
+        with metrics.timer("geometry"):
+            table = load_table()
+            if table and table.contains(params["angle_degree"], params["height_inches"]):
+                metrics.put_property("source", "table")
+                stats = table.stats(params["angle_degree"], params["height_inches"])
+            else:
+                metrics.put_property("source", "computed")
+                stats = kicker_stats(params["angle_degree"], height_inches=params["height_inches"])
+        return {
+            "statusCode": 200,
+            "body": json.dumps(stats)
+        }
+
+    config = KickerConfig(**params, output_format=output_format)
+    stats = render_ramp(Kicker, config, metrics)
+    if config.debug:
+        print(f"kicker_geometry {kicker_geometry.cache_info()}")
+    return {
+        "statusCode": 200,
+        "body": json.dumps(stats)
+    }
+
+
+def render_ramp(ramp_class, config, metrics: Metrics) -> dict:
+    """
+    The render path shared by kickers and rollers: returns the cached stats
+    for config, or draws the ramp, uploads and saves it and caches the stats.
+    """
+    key = config.cache_key()
+    with metrics.timer("cache_lookup"):
+        stats = render_cache.get(key)
+    if stats:
+        metrics.put_property("path", "cache_hit")
+        return stats
+
+    metrics.put_property("path", "render")
+    ramp = ramp_class(config, metrics=metrics)
+    ramp.draw_image()
+
+    url, id = ramp.persist(id=key)
+    stats = ramp.stats
+    stats.update({"id": id})
+    with metrics.timer("cache_store"):
+        render_cache.put(key, stats)
+    if config.debug:
+        print(f"Saved to S3 {url}")
+        print(json.dumps(stats, indent=2))
+        print(f"load_font {load_font.cache_info()}")
+    return stats
+
+
+def clean_roller_params(params):
+    """
+    length in feet and height in inches, how rollers are usually named (a 10 ft by 18 in roller).
+    """
+    if params.get("length"):
+        length_inches = float(params["length"]) * 12.0
+    else:
+        raise Exception("length not provided")
+
+    if params.get("height"):
+        height_inches = float(params["height"])
+    else:
+        raise Exception("height not provided")
+
+    if length_inches <= 0 or height_inches <= 0:
+        raise Exception("length and height must be greater than 0")
+    return {
+        "length_in_inches": length_inches,
+        "height_inches": height_inches,
+        "debug": True if params.get("debug") == "true" else False
+    }
+
+
+def roller_handler(event, context):
+    """
+    The roller counterpart of lambda_handler, query parameters length (feet),
+    height (inches) and format. format=json returns the stats from
+    roller_math without drawing, anything else renders like a kicker.
+    """
+    metrics = Metrics(Function="roller")
+    try:
+        with metrics.timer("total"):
+            return handle_roller(event["queryStringParameters"], metrics)
+    finally:
+        metrics.emit()
 
-    stats = kicker.stats
-    
-    print("Saving to DynamoDB")
-    id = kicker.save()
-    stats.update({"id": id}) 
-    print(json.dumps(stats, indent=2))
 
+def handle_roller(query, metrics: Metrics):
+    params = clean_roller_params(query)
+    output_format = clean_format(query)
+    if output_format == "json":
+        metrics.put_property("path", "json")
+        with metrics.timer("geometry"):
+            stats = roller_stats(params["length_in_inches"], params["height_inches"])
+        return {
+            "statusCode": 200,
+            "body": json.dumps(stats)
+        }
+
+    config = RollerConfig(**params, output_format=output_format)
+    stats = render_ramp(Roller, config, metrics)
     return {
         "statusCode": 200,
         "body": json.dumps(stats)
     }
+
+
+def template_handler(event, context):
+    """
+    Full scale printable templates (see tiles.py) of a kicker (angle, height
+    in feet) or a roller (ramp=roller, length in feet, height in inches),
+    format pdf_tiles (default) or png_tiles. They run to dozens of pages, so
+    they get their own function with more memory and time than /kicker.
+    """
+    metrics = Metrics(Function="template")
+    try:
+        with metrics.timer("total"):
+            return handle_template(event["queryStringParameters"], metrics)
+    finally:
+        metrics.emit()
+
+
+def handle_template(query, metrics: Metrics):
+    output_format = query.get("format", TILED_FORMATS[0])
+    if output_format not in TILED_FORMATS:
+        raise Exception(f"format must be one of {', '.join(TILED_FORMATS)}. You gave {output_format}")
+
+    ramp = query.get("ramp", "kicker")
+    if ramp == "kicker":
+        stats = render_ramp(Kicker, KickerConfig(**clean_params(query), output_format=output_format), metrics)
+    elif ramp == "roller":
+        stats = render_ramp(Roller, RollerConfig(**clean_roller_params(query), output_format=output_format), metrics)
+    else:
+        raise Exception(f"ramp must be kicker or roller. You gave {ramp}")
+    return {
+        "statusCode": 200,
+        "body": json.dumps(stats)
+    }
+
+
+def batch_handler(event, context):
+    """
+    Computes or renders a set of kickers in one call.
+
+    The request body (or the event itself when invoked directly) is JSON like
+    {"angles": {"start": 40, "stop": 60, "step": 5}, "heights": [3, 4, 5], "format": "png"}.
+    See clean_batch_params.
+
+    With format=json only the stats are returned, computed in one vectorized
+    pass. Otherwise cached designs are looked up, the rest are rendered and
+    uploaded in a thread pool and saved to DynamoDB with batch writes.
+    """
+    metrics = Metrics(Function="batch")
+    try:
+        with metrics.timer("total"):
+            return handle_batch(event, metrics)
+    finally:
+        metrics.emit()
+
+
+def handle_batch(event, metrics: Metrics):
+    spec = json.loads(event["body"]) if event.get("body") else event
+    designs = clean_batch_params(spec)
+    output_format = clean_format(spec)
+    limit = MAX_BATCH_STATS if output_format == "json" else MAX_BATCH_RENDERS
+    if len(designs) > limit:
+        raise Exception(f"At most {limit} designs per batch. You gave {len(designs)}")
+
+    metrics.put_property("designs", len(designs))
+    if output_format == "json":
+        metrics.put_property("path", "json")
+        with metrics.timer("geometry"):
+            results = kicker_stats_batch([d[0] for d in designs], [d[1] for d in designs])
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"designs": results})
+        }
+
+    # BATCH_WORKERS canvases are drawn at once, each gets its share of memory.
+    max_bytes = render_budget(BATCH_WORKERS)
+    configs = [KickerConfig(angle_degree=angle, height_inches=height, output_format=output_format, max_bytes=max_bytes)
+               for angle, height in designs]
+    keys = [config.cache_key() for config in configs]
+    with metrics.timer("cache_lookup"):
+        results = [render_cache.get(key) for key in keys]
+    # The same design can appear more than once, only render it once.
+    misses = {key: config for key, config, stats in zip(keys, configs, results) if not stats}
+    metrics.put_property("path", "render")
+    metrics.put_property("rendered", len(misses))
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+            with metrics.timer("render"):
+                rendered = list(pool.map(render_kicker, misses.values(), misses.keys()))
+            with metrics.timer("db_write"):
+                batch_create("Kicker", rendered)
+        with metrics.timer("cache_store"):
+            for stats in rendered:
+                render_cache.put(stats["id"], stats)
+
+        by_key = {stats["id"]: stats for stats in rendered}
+        results = [stats if stats else by_key[key] for key, stats in zip(keys, results)]
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"designs": results})
+    }
+
+
+def solve_handler(event, context):
+    """
+    Finds kickers that meet two constraints each, e.g. a max 8 ft arclength
+    at 50 degrees or a 6 ft footprint that is 3 ft tall.
+
+    The request body (or the event itself when invoked directly) is JSON like
+    {"designs": [{"arclength": 8, "angle": 50}, {"length": 6, "height": 3}]}
+    with any two of angle (degrees), height, radius, length, arclength and
+    board_length (feet) per design. Each result has every one of those plus
+    mid_x, mid_y, curve_depth_major, curve_depth_minor (feet) and join_angle
+    (degrees), or null when no kicker of 0-90 degrees meets the constraints.
+    """
+    metrics = Metrics(Function="solve")
+    try:
+        with metrics.timer("total"):
+            return handle_solve(event, metrics)
+    finally:
+        metrics.emit()
+
+
+def handle_solve(event, metrics: Metrics):
+    spec = json.loads(event["body"]) if event.get("body") else event
+    designs = spec.get("designs")
+    if not isinstance(designs, list) or not designs:
+        raise Exception("designs not provided")
+    if len(designs) > MAX_SOLVE_DESIGNS:
+        raise Exception(f"At most {MAX_SOLVE_DESIGNS} designs per call. You gave {len(designs)}")
+
+    constraints = []
+    for design in designs:
+        if not isinstance(design, dict) or set(design) - set(QUANTITIES):
+            raise Exception(f"Each design is an object with two of {', '.join(QUANTITIES)}. You gave {design}")
+        constraints.append({name: float(value) if name == "angle" else float(value) * 12.0
+                            for name, value in design.items()})
+
+    metrics.put_property("designs", len(designs))
+    with metrics.timer("solve"):
+        solved = solve_designs(constraints)
+
+    results = []
+    for row in solved:
+        if row is None:
+            results.append(None)
+            continue
+        results.append({name: format_float(value if name in ("angle", "join_angle") else value / 12.0, 4)
+                        for name, value in row.items()})
+    return {
+        "statusCode": 200,
+        "body": json.dumps({"designs": results})
+    }
@@ -0,0 +1,65 @@
+"""
+Shared boto3 clients and resources.
+
+boto3 is imported on first use and each client is created once per process,
+so requests that never touch AWS skip the import on a cold start and warm
+invocations reuse the same client and its connection pool.
+
+Setting {SERVICE}_ENDPOINT_URL, e.g. DYNAMODB_ENDPOINT_URL, points a service at
+a local stand-in such as DynamoDB Local from docker-compose.yml. It is read
+here rather than left to boto3, which only honours per-service endpoint
+variables from 1.28.
+"""
+import os
+from decimal import Decimal
+from functools import lru_cache
+from math import isfinite
+from numbers import Integral
+
+BUCKET_NAME = "mtb-ramps"
+REGION = "us-west-2"
+
+
+def endpoint_url(service_name: str):
+    """
+    The endpoint set for service_name in the environment, None for AWS.
+    """
+    return os.getenv(f"{service_name.upper()}_ENDPOINT_URL") or None
+
+
+@lru_cache(maxsize=None)
+def get_client(service_name: str):
+    import boto3
+    return boto3.client(service_name, region_name=REGION, endpoint_url=endpoint_url(service_name))
+
+
+@lru_cache(maxsize=None)
+def get_resource(service_name: str):
+    import boto3
+    return boto3.resource(service_name, region_name=REGION, endpoint_url=endpoint_url(service_name))
+
+
+@lru_cache(maxsize=None)
+def get_table(table_name: str):
+    return get_resource('dynamodb').Table(table_name)
+
+
+def to_dynamodb(value):
+    """
+    Converts stats to the types the DynamoDB resource API accepts: floats
+    become Decimals of their shortest repr, the same digits json.dumps writes,
+    and tuples become lists.
+    """
+    if isinstance(value, dict):
+        return {key: to_dynamodb(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamodb(item) for item in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, Integral):
+        return int(value)
+    if isinstance(value, float):
+        if not isfinite(value):
+            raise Exception(f"DynamoDB can not store {value}")
+        return Decimal(repr(float(value)))
+    raise Exception(f"Can not store {type(value).__name__} in DynamoDB")
@@ -0,0 +1,78 @@
+"""
+Array backed curve generation shared by Kicker and Roller.
+
+Every function returns NumPy arrays of pixel coordinates so a whole profile is
+computed in one vectorized pass rather than one Python iteration per pixel.
+
+Curves are sampled adaptively: the number of points is the minimum needed to
+keep the polyline within `tolerance` pixels of the true curve, so point count
+depends on the shape of the curve and not on its size in pixels.
+"""
+from math import acos, ceil, sqrt
+from typing import List, Tuple
+
+import numpy as np
+
+# Maximum distance in pixels between the polyline and the true curve.
+DEFAULT_TOLERANCE = 0.25
+
+# Fewest segments a curve is split into, consumers need at least 3 points.
+MIN_SEGMENTS = 4
+
+
+def arc_segments(radius: float, sweep: float, tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """
+    Number of chords needed so the sagitta of each chord on an arc of
+    `radius` pixels sweeping `sweep` radians is no more than `tolerance`.
+    """
+    if radius <= tolerance:
+        return MIN_SEGMENTS
+    step = 2.0 * acos(1.0 - tolerance / radius)
+    return max(MIN_SEGMENTS, ceil(abs(sweep) / step))
+
+
+def sine_segments(amplitude: float, w: float, length: float, tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """
+    Number of evenly spaced segments in x needed so linear interpolation of
+    amplitude * sin(w * x) over `length` pixels stays within `tolerance`.
+
+    Uses the interpolation error bound h^2 * max|y''| / 8.
+    """
+    curvature = abs(amplitude) * w ** 2
+    if curvature == 0:
+        return MIN_SEGMENTS
+    step = sqrt(8.0 * tolerance / curvature)
+    return max(MIN_SEGMENTS, ceil(length / step))
+
+
+def arc_curve(radius: float, theta_start: float, theta_end: float, tolerance: float = DEFAULT_TOLERANCE,
+              x_offset: float = 0.0, y_offset: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Samples a circular arc of `radius` pixels centered at (x_offset, y_offset)
+    with theta running from theta_start to theta_end inclusive.
+    """
+    segments = arc_segments(radius, theta_end - theta_start, tolerance)
+    theta = np.linspace(theta_start, theta_end, segments + 1)
+    x = radius * np.cos(theta) + x_offset
+    y = radius * np.sin(theta) + y_offset
+    return x, y
+
+
+def sine_curve(amplitude: float, w: float, phase: float, length: float, tolerance: float = DEFAULT_TOLERANCE,
+               x_offset: float = 0.0, y_offset: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Samples y = amplitude * sin(w * x + phase) + y_offset for x in [0, length],
+    then shifts x by x_offset.
+    """
+    segments = sine_segments(amplitude, w, length, tolerance)
+    x = np.linspace(0.0, length, segments + 1)
+    y = amplitude * np.sin(w * x + phase) + y_offset
+    return x + x_offset, y
+
+
+def flatten(x: np.ndarray, y: np.ndarray) -> List[float]:
+    """
+    Interleaves x and y into the flat [x0, y0, x1, y1, ...] sequence
+    ImageDraw.line accepts, avoiding a tuple per point.
+    """
+    return np.column_stack((x, y)).ravel().tolist()
@@ -0,0 +1,167 @@
+"""
+Precomputed kicker geometry for the common design space.
+
+Most requests ask for angles of 20-70 degrees and heights of 1-10 ft. At a
+fixed angle every length of a kicker is proportional to its height, so the
+geometry is stored once per angle for a 1 inch tall kicker (design_table.npy,
+0.01 degree steps) and scaled by the height, which is exact in height and
+interpolated only in angle. Rung counts are not proportional, they are stored
+on a coarser angle x height grid (design_rungs.npy).
+
+Both files are memory mapped on first use, so a lookup is an interpolation
+with no trig. Rebuild them after changing ramp_math or the grid:
+
+python design_table.py
+"""
+import os
+from functools import lru_cache
+from math import floor
+from typing import Dict, Optional
+
+import numpy as np
+
+from ramp_math import kicker_arrays
+from rungs import DEFAULT_GAP, arc_rung_count
+from utils import TO_RADIANS, format_float
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TABLE_PATH = os.path.join(HERE, "design_table.npy")
+RUNGS_PATH = os.path.join(HERE, "design_rungs.npy")
+
+# The grid, changing it needs a rebuild
+ANGLE_START = 20.0  # degrees
+ANGLE_STOP = 70.0
+ANGLE_STEP = 0.01
+RUNG_ANGLE_STEP = 0.5
+HEIGHT_START = 12.0  # inches
+HEIGHT_STOP = 120.0
+HEIGHT_STEP = 1.0
+RUNG_WIDTH = 5.5
+
+COLUMNS = ["angle", "height", "length", "radius", "arclength", "mid_x", "mid_y", "board_length",
+           "curve_depth_major", "curve_depth_minor", "join_angle"]
+# Columns that do not scale with height
+ANGLE_COLUMNS = ["angle", "join_angle"]
+
+
+def _axis(start: float, stop: float, step: float) -> np.ndarray:
+    return start + step * np.arange(round((stop - start) / step) + 1)
+
+
+def build_table(table_path: str = TABLE_PATH, rungs_path: str = RUNGS_PATH):
+    """
+    Writes the per angle geometry, float64 (angles, COLUMNS), and the rung
+    counts, int16 (angles, heights).
+    """
+    columns = kicker_arrays(_axis(ANGLE_START, ANGLE_STOP, ANGLE_STEP), height_inches=1.0)
+    table = np.stack([columns[name] for name in COLUMNS], axis=-1)
+    np.save(table_path, table)
+
+    angles, heights = np.meshgrid(_axis(ANGLE_START, ANGLE_STOP, RUNG_ANGLE_STEP),
+                                  _axis(HEIGHT_START, HEIGHT_STOP, HEIGHT_STEP), indexing="ij")
+    radius = kicker_arrays(angles, height_inches=heights)["radius"]
+    rungs = arc_rung_count(radius, angles * TO_RADIANS, RUNG_WIDTH).astype(np.int16)
+    np.save(rungs_path, rungs)
+    return table, rungs
+
+
+class DesignTable():
+    def __init__(self, table_path: str = TABLE_PATH, rungs_path: str = RUNGS_PATH):
+        self.table = np.load(table_path, mmap_mode="r")
+        self.rungs = np.load(rungs_path, mmap_mode="r")
+        angle_count = len(_axis(ANGLE_START, ANGLE_STOP, ANGLE_STEP))
+        rung_shape = (len(_axis(ANGLE_START, ANGLE_STOP, RUNG_ANGLE_STEP)),
+                      len(_axis(HEIGHT_START, HEIGHT_STOP, HEIGHT_STEP)))
+        if self.table.shape != (angle_count, len(COLUMNS)) or self.rungs.shape != rung_shape:
+            raise Exception("The design table does not match the grid in design_table.py, rebuild it")
+        self.scaled = np.array([name not in ANGLE_COLUMNS for name in COLUMNS])
+
+    def contains(self, angle_degree, height_inches) -> bool:
+        angle_degree = np.asarray(angle_degree)
+        height_inches = np.asarray(height_inches)
+        return bool(np.all((angle_degree >= ANGLE_START) & (angle_degree <= ANGLE_STOP) &
+                           (height_inches >= HEIGHT_START) & (height_inches <= HEIGHT_STOP)))
+
+    def lookup(self, angle_degree, height_inches) -> Dict[str, np.ndarray]:
+        """
+        Columns of ramp_math.kicker_arrays plus rung_count for one or many
+        designs inside the table. rung_count is read from the grid on grid
+        points and computed from the radius elsewhere.
+        """
+        if not self.contains(angle_degree, height_inches):
+            raise Exception("Design is outside the table, use ramp_math.kicker_arrays")
+        angle_degree, height_inches = np.broadcast_arrays(np.asarray(angle_degree, dtype=np.float64),
+                                                          np.asarray(height_inches, dtype=np.float64))
+        a = (angle_degree - ANGLE_START) / ANGLE_STEP
+        i = np.minimum(np.floor(a).astype(np.int64), len(self.table) - 2)
+        f = (a - i)[..., None]
+        values = (1 - f) * self.table[i] + f * self.table[i + 1]
+        values = np.where(self.scaled, values * height_inches[..., None], values)
+        out = {name: values[..., k] for k, name in enumerate(COLUMNS)}
+
+        ra = (angle_degree - ANGLE_START) / RUNG_ANGLE_STEP
+        rh = (height_inches - HEIGHT_START) / HEIGHT_STEP
+        on_grid = (ra == np.floor(ra)) & (rh == np.floor(rh))
+        rung_count = arc_rung_count(out["radius"], angle_degree * TO_RADIANS, RUNG_WIDTH)
+        if np.any(on_grid):
+            stored = self.rungs[ra[on_grid].astype(np.int64), rh[on_grid].astype(np.int64)]
+            rung_count[on_grid] = stored
+        out["rung_count"] = rung_count
+        return out
+
+    def stats(self, angle_degree: float, height_inches: float) -> dict:
+        """
+        The same dict as ramp_math.kicker_stats for the default rung width.
+        Scalar fast path: two row reads and an interpolation, plus
+        rungs.arc_rung_count (NumPy and two arcsines) for designs off the rung
+        grid.
+        """
+        if not (ANGLE_START <= angle_degree <= ANGLE_STOP and HEIGHT_START <= height_inches <= HEIGHT_STOP):
+            raise Exception("Design is outside the table, use ramp_math.kicker_stats")
+        a = (angle_degree - ANGLE_START) / ANGLE_STEP
+        i = min(floor(a), len(self.table) - 2)
+        f = a - i
+        low = self.table[i].tolist()
+        high = self.table[i + 1].tolist()
+        row = {name: (1 - f) * low[k] + f * high[k] for k, name in enumerate(COLUMNS)}
+        row = {name: value if name in ANGLE_COLUMNS else value * height_inches for name, value in row.items()}
+
+        ra = (angle_degree - ANGLE_START) / RUNG_ANGLE_STEP
+        rh = (height_inches - HEIGHT_START) / HEIGHT_STEP
+        if ra == int(ra) and rh == int(rh):
+            rung_count = int(self.rungs[int(ra), int(rh)])
+        else:
+            rung_count = int(arc_rung_count(row["radius"], angle_degree * TO_RADIANS, RUNG_WIDTH))
+
+        angle_radian = angle_degree * TO_RADIANS
+        return {
+            "height_feet": format_float(height_inches / 12.0, 2),
+            "height_inches": format_float(height_inches, 2),
+            "length_feet": format_float(row["length"] / 12.0, 2),
+            "length_inches": format_float(row["length"], 2),
+            "radius_feet": format_float(row["radius"] / 12.0, 2),
+            "radius_inches": format_float(row["radius"], 2),
+            "takeoff_angle_degrees": format_float(angle_degree, 2),
+            "takeoff_angle_radians": format_float(angle_radian, 2),
+            "arclength_inches": format_float(row["arclength"], 2),
+            "arclength_feet": format_float(row["arclength"] / 12.0, 2),
+            "rung_count": rung_count,
+            "rung_width_inches": RUNG_WIDTH,
+            "rung_gap_inches": DEFAULT_GAP,
+        }
+
+
+@lru_cache(maxsize=1)
+def load_table() -> Optional[DesignTable]:
+    """
+    The table, mapped once per process. None when it has not been built.
+    """
+    if not (os.path.exists(TABLE_PATH) and os.path.exists(RUNGS_PATH)):
+        return None
+    return DesignTable()
+
+
+if __name__ == '__main__':
+    table, rungs = build_table()
+    print(f"Wrote {TABLE_PATH} {table.shape} {table.nbytes / 1024:.0f} KB")
+    print(f"Wrote {RUNGS_PATH} {rungs.shape} {rungs.nbytes / 1024:.0f} KB")
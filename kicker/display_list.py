@@ -0,0 +1,222 @@
+"""
+The drawing of a ramp as data.
+
+RampBase records every line and label into a DisplayList instead of drawing on
+an image. Backends then turn the same list into a raster image (raster.py), an
+SVG (svg.py) or a full scale PDF (pdf.py), so the geometry is computed once no
+matter how many formats are written.
+
+Coordinates are canvas pixels with y down, the same as Pillow.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+# Every colour the ramps draw with, as RGB for backends without colour names.
+# Also the fixed palette of palette canvases and png8, in this order, so white
+# (the background) is index 0. What each part of a plan is drawn in is set in
+# ramp_base.
+COLORS = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "grey": (128, 128, 128),
+    "red": (255, 0, 0),
+}
+PALETTE = list(COLORS.values())
+
+
+def rgb(fill) -> Tuple[int, int, int]:
+    if isinstance(fill, (tuple, list)):
+        return (fill[0], fill[1], fill[2])
+    if fill not in COLORS:
+        raise Exception(f"Unknown colour {fill}")
+    return COLORS[fill]
+
+
+def palette_index(fill) -> int:
+    color = rgb(fill)
+    if color not in PALETTE:
+        raise Exception(f"{fill} is not in the palette, add it to COLORS")
+    return PALETTE.index(color)
+
+
+def point_pairs(xy) -> List[Tuple[float, float]]:
+    """
+    Lines are [(x, y), ...] or a flat [x, y, x, y, ...] like ImageDraw accepts.
+    """
+    xy = list(xy)
+    if xy and not isinstance(xy[0], (tuple, list)):
+        return list(zip(xy[0::2], xy[1::2]))
+    return [(p[0], p[1]) for p in xy]
+
+
+def segments_hit(start: np.ndarray, end: np.ndarray, rect: Tuple[float, float, float, float]) -> bool:
+    """
+    Whether any of the straight lines start[i] -> end[i] ((n, 2) arrays)
+    crosses rect (left, top, right, bottom). Liang-Barsky clipping on all
+    lines at once: each edge of rect trims the line's parameter range [0, 1],
+    the line reaches rect if some of the range is left.
+    """
+    left, top, right, bottom = rect
+    d = end - start
+    t0 = np.zeros(len(start))
+    t1 = np.ones(len(start))
+    hit = np.ones(len(start), dtype=bool)
+    for p, q in ((-d[:, 0], start[:, 0] - left), (d[:, 0], right - start[:, 0]),
+                 (-d[:, 1], start[:, 1] - top), (d[:, 1], bottom - start[:, 1])):
+        parallel = p == 0
+        hit &= ~(parallel & (q < 0))
+        r = np.divide(q, p, out=np.zeros_like(q), where=~parallel)
+        t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+        t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+    return bool(np.any(hit & (t0 <= t1)))
+
+
+def _padded(rect: Tuple[float, float, float, float], pad: float) -> Tuple[float, float, float, float]:
+    return (rect[0] - pad, rect[1] - pad, rect[2] + pad, rect[3] + pad)
+
+
+def _overlaps(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> bool:
+    return a[2] >= b[0] and a[0] <= b[2] and a[3] >= b[1] and a[1] <= b[3]
+
+
+# Rough text width per character as a fraction of the font size, only used to
+# decide which tiles a label can reach.
+TEXT_WIDTH_PER_CHAR = 0.6
+
+
+class Line():
+    def __init__(self, xy, fill, width: float):
+        """
+        xy: two or more points, drawn as one polyline
+        """
+        self.xy = xy
+        self.fill = fill
+        self.width = width
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        points = point_pairs(self.xy)
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        pad = self.width / 2.0
+        return (min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+
+    def hits(self, rect: Tuple[float, float, float, float]) -> bool:
+        """
+        Whether the stroke reaches rect (left, top, right, bottom).
+        """
+        if not _overlaps(self.bounds(), rect):
+            return False
+        points = np.array(point_pairs(self.xy), dtype=np.float64)
+        return segments_hit(points[:-1], points[1:], _padded(rect, self.width / 2.0))
+
+
+class Segments():
+    def __init__(self, segments: np.ndarray, fill, width: float):
+        """
+        segments: (n, 2, 2) array, n separate straight lines ((x0, y0), (x1, y1))
+        sharing a colour and width, e.g. the rungs. One item no matter how many.
+        """
+        self.segments = segments
+        self.fill = fill
+        self.width = width
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        pad = self.width / 2.0
+        x = self.segments[..., 0]
+        y = self.segments[..., 1]
+        return (x.min() - pad, y.min() - pad, x.max() + pad, y.max() + pad)
+
+    def hits(self, rect: Tuple[float, float, float, float]) -> bool:
+        if not _overlaps(self.bounds(), rect):
+            return False
+        return segments_hit(self.segments[:, 0], self.segments[:, 1], _padded(rect, self.width / 2.0))
+
+
+class Text():
+    def __init__(self, xy: Tuple[float, float], text: str, fill, font_size: int):
+        """
+        xy: top left of the text
+        """
+        self.xy = xy
+        self.text = text
+        self.fill = fill
+        self.font_size = font_size
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        x, y = self.xy
+        return (x, y, x + len(self.text) * self.font_size * TEXT_WIDTH_PER_CHAR, y + self.font_size * 1.2)
+
+    def hits(self, rect: Tuple[float, float, float, float]) -> bool:
+        return _overlaps(self.bounds(), rect)
+
+
+class DisplayList():
+    def __init__(self, size: Tuple[int, int], background='white'):
+        self.size = size
+        self.background = background
+        self.items = []
+        # (first item, name) of each layer, see layers
+        self.layer_starts = []
+
+    def line(self, xy, fill='black', width: float = 1):
+        self.items.append(Line(xy, fill, width))
+
+    def polygon(self, xy, fill='black', width: float = 1):
+        """
+        A closed outline, one polyline back to the first point.
+        """
+        points = point_pairs(xy)
+        self.items.append(Line(points + points[:1], fill, width))
+
+    def segments(self, start_x, start_y, end_x, end_y, fill='black', width: float = 1):
+        """
+        Many separate lines as one Segments item, from arrays of end points.
+        """
+        segments = np.stack([np.stack([start_x, start_y], axis=-1), np.stack([end_x, end_y], axis=-1)], axis=-2)
+        if len(segments):
+            self.items.append(Segments(segments.astype(np.float64), fill, width))
+
+    def text(self, xy: Tuple[float, float], text: str, fill='black', font_size: int = 10):
+        self.items.append(Text(xy, text, fill, font_size))
+
+    def __len__(self):
+        return len(self.items)
+
+    def start_layer(self, name: str):
+        """
+        Items added from now on belong to layer name, e.g. "rungs".
+        """
+        self.layer_starts.append((len(self.items), name))
+
+    def layers(self, start: int = 0) -> List[Tuple[str, int, int]]:
+        """
+        (name, start, end) for each run of items from start on, split where a
+        layer starts. Items added before any layer are named "raster".
+        """
+        marks = [(0, "raster")] + self.layer_starts + [(len(self.items), "")]
+        runs = []
+        for (first, name), (end, _) in zip(marks, marks[1:]):
+            first = max(first, start)
+            if first < end:
+                runs.append((name, first, end))
+        return runs
+
+    def clipped(self, origin: Tuple[float, float], size: Tuple[float, float]) -> "DisplayList":
+        """
+        A display list with only the items that reach the region at origin
+        with size, so a tile does not draw the whole ramp.
+        """
+        rect = (origin[0], origin[1], origin[0] + size[0], origin[1] + size[1])
+        out = DisplayList(self.size, self.background)
+        out.items = [item for item in self.items if item.hits(rect)]
+        return out
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        The union of the items' bounds, (left, top, right, bottom).
+        """
+        if not self.items:
+            raise Exception("An empty display list has no bounds")
+        boxes = np.array([item.bounds() for item in self.items], dtype=np.float64)
+        return (boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max())
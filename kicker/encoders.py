@@ -0,0 +1,171 @@
+"""
+Output formats for rendered plans, selected per request by name.
+
+The plans are black, grey and red line art on white, so a full 24 bit PNG is
+mostly wasted bytes. png8 and png1 draw straight into a palette or 1-bit
+canvas (see raster.py), nothing to convert before encoding. Pillow keeps a
+byte per pixel for both, so either is a third of the memory of RGB. Encoded
+from a 55 degree / 6 ft kicker at 20 ppi:
+
+    png     full colour, compress_level 6     ~105 KB  ~310 ms
+    png8    4 colour palette, level 8          ~31 KB   ~60 ms
+    png1    1 bit black and white, level 8     ~28 KB   ~60 ms
+    webp    lossless WebP, method 2            ~30 KB  ~310 ms
+    svg     vectors, never rasterized           ~6 KB, no canvas at all
+    pdf     vectors at full scale for printing
+    pdf_tiles  full scale on letter pages, one page per tile, see tiles.py
+    png_tiles  the same tiles as 150 dpi PNGs in a zip
+
+webp needs ~25 bytes per pixel to encode, so on the 128 MB Lambda
+fit_resolution brings it down to ~10 ppi (~16 KB).
+"""
+from typing import Callable
+
+from display_list import PALETTE
+from pdf import write_pdf
+from raster import BYTES_PER_PIXEL
+from svg import write_svg
+from tiles import TiledRenderer
+
+# zlib levels, picked from the mean size and encode time of three plans
+# (55 deg / 6 ft and 70 deg / 10 ft kickers, 12 ft x 24 in roller) at 20 ppi:
+#
+#    level          1       3       6       8       9
+#    png (RGB)   213 KB  203 KB  116 KB  113 KB  113 KB
+#                 41 ms   37 ms   52 ms   79 ms  137 ms
+#    png8         53 KB   49 KB   37 KB   35 KB   33 KB
+#                  4 ms    6 ms    7 ms   11 ms   38 ms
+#    png1         41 KB   38 KB   32 KB   30 KB   28 KB
+#                  7 ms    8 ms    6 ms   11 ms   32 ms
+#
+# Full colour gains under 3% past 6 for 50-150% more time. Palette images
+# are a third of the data, so 8 buys 7% smaller files for ~4 ms.
+PNG_COMPRESS_LEVEL = 6
+PALETTE_COMPRESS_LEVEL = 8
+# Pixels lighter than this become white in png1, everything drawn becomes black.
+ONE_BIT_THRESHOLD = 200
+WEBP_METHOD = 2
+
+
+class Encoder():
+    def __init__(self, name: str, content_type: str, extension: str, save: Callable, vector: bool = False,
+                 canvas_mode: str = "RGB", encode_bytes_per_pixel: float = 0.0, convert_bytes_per_pixel: float = 0.0):
+        """
+        save: save(ramp, fp) writes the drawn ramp to a binary file object
+        vector: written from the display list, the ramp is never rasterized
+        canvas_mode: the Pillow mode rasterized formats draw into by default
+        encode_bytes_per_pixel: memory the encoder needs on top of the canvas
+        convert_bytes_per_pixel: the copies save makes of a canvas in another mode
+        """
+        self.name = name
+        self.content_type = content_type
+        self.extension = extension
+        self.save = save
+        self.vector = vector
+        self.canvas_mode = canvas_mode
+        self.encode_bytes_per_pixel = encode_bytes_per_pixel
+        self.convert_bytes_per_pixel = convert_bytes_per_pixel
+
+    def bytes_per_pixel(self, mode: str) -> float:
+        """
+        Peak memory per canvas pixel to draw in mode and encode, canvas
+        included, see BaseConfig.fit_resolution. Vector formats have no canvas.
+        """
+        if self.vector:
+            return 0.0
+        converted = 0.0 if mode == self.canvas_mode else self.convert_bytes_per_pixel
+        return BYTES_PER_PIXEL[mode] + converted + self.encode_bytes_per_pixel
+
+
+def _palette_image():
+    from PIL import Image
+
+    flat = [channel for color in PALETTE for channel in color]
+    # Pad with white, quantize maps to the closest entry of all 256.
+    flat += list(PALETTE[0]) * (256 - len(PALETTE))
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(flat)
+    return palette
+
+
+def save_png(ramp, fp):
+    ramp.rasterize().save(fp, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+def save_png8(ramp, fp):
+    from PIL import Image
+
+    image = ramp.rasterize()
+    if image.mode != "P":
+        # Anti-aliased text snaps to the nearest palette colour.
+        image = image.convert("RGB").quantize(palette=_palette_image(), dither=Image.Dither.NONE)
+    image.save(fp, format="PNG", compress_level=PALETTE_COMPRESS_LEVEL)
+
+
+def save_png1(ramp, fp):
+    image = ramp.rasterize()
+    if image.mode != "1":
+        image = image.convert("L").point(lambda v: 255 if v > ONE_BIT_THRESHOLD else 0, mode="1")
+    image.save(fp, format="PNG", compress_level=PALETTE_COMPRESS_LEVEL)
+
+
+def save_webp(ramp, fp):
+    image = ramp.rasterize()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    image.save(fp, format="WEBP", lossless=True, method=WEBP_METHOD)
+
+
+def save_svg(ramp, fp):
+    write_svg(ramp.display_list, fp)
+
+
+def save_pdf(ramp, fp):
+    write_pdf(ramp.display_list, ramp.config.pixels_per_inch, fp)
+
+
+def save_pdf_tiles(ramp, fp):
+    TiledRenderer(ramp).write_pdf(fp)
+
+
+def save_png_tiles(ramp, fp):
+    TiledRenderer(ramp).write_zip(fp)
+
+
+# encode_bytes_per_pixel from the peak RSS of rendering a 60 deg / 8 ft kicker
+# at 8 and 20 ppi: png ~0.8 over its RGB canvas, png8 and png1 ~0.2 over
+# theirs, lossless WebP ~22, by far the hungriest.
+ENCODERS = {
+    "png": Encoder("png", "image/png", "png", save_png, encode_bytes_per_pixel=1.0),
+    "png8": Encoder("png8", "image/png", "png", save_png8, canvas_mode="P",
+                    encode_bytes_per_pixel=0.25, convert_bytes_per_pixel=4.0),
+    "png1": Encoder("png1", "image/png", "png", save_png1, canvas_mode="1",
+                    encode_bytes_per_pixel=0.25, convert_bytes_per_pixel=2.0),
+    "webp": Encoder("webp", "image/webp", "webp", save_webp, encode_bytes_per_pixel=22.0,
+                    convert_bytes_per_pixel=3.0),
+    "svg": Encoder("svg", "image/svg+xml", "svg", save_svg, vector=True),
+    "pdf": Encoder("pdf", "application/pdf", "pdf", save_pdf, vector=True),
+    "pdf_tiles": Encoder("pdf_tiles", "application/pdf", "pdf", save_pdf_tiles, vector=True),
+    "png_tiles": Encoder("png_tiles", "application/zip", "zip", save_png_tiles, vector=True),
+}
+DEFAULT_FORMAT = "png"
+# Multi-page full scale templates, served by their own larger function (see
+# app.template_handler) rather than the 128 MB render functions.
+TILED_FORMATS = ("pdf_tiles", "png_tiles")
+
+
+def get_encoder(name: str) -> Encoder:
+    if name not in ENCODERS:
+        raise Exception(f"format must be one of {', '.join(ENCODERS)}. You gave {name}")
+    return ENCODERS[name]
+
+
+def output_filename(stem: str, name: str) -> str:
+    """
+    Formats that share an extension get the format in the name so they do not
+    overwrite each other, e.g. ramp.png, ramp_png8.png, ramp.svg.
+    """
+    encoder = get_encoder(name)
+    if name != DEFAULT_FORMAT and name != encoder.extension:
+        stem = f"{stem}_{name}"
+    return f"{stem}.{encoder.extension}"
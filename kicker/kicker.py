@@ -1,33 +1,41 @@
+import hashlib
 import json
 import math
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
 
-from PIL import Image, ImageDraw
+import numpy as np
 
-from ramp_base import (BaseConfig, RampBase, dist, format_float,
-                       radian_to_degree)
+from curve import arc_curve, flatten
+from encoders import DEFAULT_FORMAT
+from metrics import Metrics, layer
+from profiles import ArcProfile
+from ramp_base import (BACKGROUND_COLOR, CURVE_COLOR, CURVE_LINE_INCHES,
+                       PADDING_INCHES, RENDER_VERSION, BaseConfig, RampBase,
+                       degree_to_radian, dist, radian_to_degree)
+from ramp_math import kicker_geometry, kicker_stats
+from rungs import RungLayout, arc_rungs
 
 
 class KickerConfig(BaseConfig):
     def __init__(self, angle_degree: float, radius_inches: Optional[float] = None, height_inches: Optional[float] = None, output_dir=None, filename=None,
-                 pixels_per_inch=20, mode='RGB', show_rungs=True, show_frame=True, add_text=True, rung_width=5.5, debug=False):
+                 pixels_per_inch=None, mode=None, show_rungs=True, show_frame=True, add_text=True, rung_width=5.5, debug=False,
+                 output_format: str = DEFAULT_FORMAT, max_pixels: Optional[int] = None,
+                 max_bytes: Optional[int] = None, target_width: Optional[int] = None):
 
         self.debug = debug
-        print(f"debug = {self.debug}")
         self.radius_inches = radius_inches
         self.height_inches = height_inches
         self.angle_degree = angle_degree
-        self.angle_radian = self.angle_degree * math.pi / 180.0
+        self.angle_radian = degree_to_radian(self.angle_degree)
 
         if (radius_inches):
-            filename = f"ramp_a{angle_degree}_r{radius_inches}.png"
+            stem = f"ramp_a{angle_degree}_r{radius_inches}"
         elif (height_inches):
-            filename = f"ramp_r{angle_degree}_h{height_inches}.png"
+            stem = f"ramp_r{angle_degree}_h{height_inches}"
         else:
             raise Exception("You must provide a radius or a height in inches")
 
-        self.pixels_per_inch = pixels_per_inch
         self.mode = mode
         self.show_rungs = show_rungs
         self.show_frame = show_frame
@@ -37,35 +45,64 @@ class KickerConfig(BaseConfig):
         output_dir = output_dir if output_dir else "output"
 
         super().__init__(filename, output_dir, pixels_per_inch,
-                         mode=mode, show_frame=show_frame, add_text=add_text, debug=debug)
+                         mode=mode, show_frame=show_frame, add_text=add_text, debug=debug,
+                         output_format=output_format, max_pixels=max_pixels, max_bytes=max_bytes,
+                         target_width=target_width)
 
-
-class Kicker(RampBase):
-
-    def __init__(self, config: KickerConfig, image=None):
-        print("in Kicker")
-        self.config = config
-        super().__init__(self.config)
-
-        if (config.radius_inches):
-            [self.height_inches, self.length_inches, self.radius_inches,
-                theta] = self.compute_height(config.angle_radian, config.radius_inches)
-        elif (config.height_inches):
-            print(f"config.height_inches {config.height_inches}")
-            [self.height_inches, self.length_inches, self.radius_inches,
-                theta] = self.compute_radius(config.angle_radian, config.height_inches)
+        if radius_inches:
+            height, length, _, _ = kicker_geometry(self.angle_radian, None, radius_inches)
         else:
-            raise Exception("You must provide a radius or a height in inches")
+            height, length, _, _ = kicker_geometry(self.angle_radian, height_inches, None)
+        self.fit_resolution(length + 2 * PADDING_INCHES, height + 2 * PADDING_INCHES)
+        self.filename = filename if filename else self.keyed_filename(stem)
+
+    def cache_key(self) -> str:
+        """
+        Hash of everything that changes the rendered plan, so identical designs
+        share one render.
+        """
+        normalized = {
+            "render_version": RENDER_VERSION,
+            "angle_degree": round(float(self.angle_degree), 6),
+            "radius_inches": round(float(self.radius_inches), 6) if self.radius_inches else None,
+            "height_inches": round(float(self.height_inches), 6) if not self.radius_inches else None,
+            "pixels_per_inch": self.pixels_per_inch,
+            "mode": self.mode,
+            "show_rungs": self.show_rungs,
+            "show_frame": self.show_frame,
+            "add_text": self.add_text,
+            "rung_width": round(float(self.rung_width), 6),
+            "output_format": self.output_format,
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
 
-        self.height_feet = self.height_inches / 12.0
-        self.length_feet = self.length_inches / 12.0
-        self.radius_feet = self.radius_inches / 12.0
-        self.theta_radian = theta
-        self.theta_degree = self.theta_radian * 180.0 / math.pi
 
+class Kicker(RampBase):
 
+    def __init__(self, config: KickerConfig, image=None, metrics: Optional[Metrics] = None):
+        super().__init__(config, metrics)
+
+        with self.metrics.timer("geometry"):
+            if (config.radius_inches):
+                [self.height_inches, self.length_inches, self.radius_inches,
+                    theta] = self.compute_height(config.angle_radian, config.radius_inches)
+            elif (config.height_inches):
+                [self.height_inches, self.length_inches, self.radius_inches,
+                    theta] = self.compute_radius(config.angle_radian, config.height_inches)
+            else:
+                raise Exception("You must provide a radius or a height in inches")
+
+            self.height_feet = self.height_inches / 12.0
+            self.length_feet = self.length_inches / 12.0
+            self.radius_feet = self.radius_inches / 12.0
+            self.theta_radian = theta
+            self.theta_degree = self.theta_radian * 180.0 / math.pi
+            self.profile = ArcProfile(self.radius_inches, config.angle_radian)
+
+            self.stats = kicker_stats(config.angle_degree, height_inches=config.height_inches,
+                                      radius_inches=config.radius_inches, rung_width=config.rung_width)
+            self.rungs = self.compute_rungs()
 
-    
         self.X = int(self.length_feet * 12 * config.pixels_per_inch)
         self.Y = int(self.height_feet * 12 * config.pixels_per_inch)
         self.curve_x = []
@@ -74,59 +111,31 @@ class Kicker(RampBase):
 
         self.size = (self.padding["left"] + self.X + self.padding["right"], self.padding["bottom"] + self.Y + self.padding["top"])
         self.mode = config.mode
-        self.color = 'white'
-        self.fill_width = 10
-        print("in Kicker 3")
-        self.image = image if image else Image.new(
-            self.mode, self.size, self.color)
-        print("in Kicker 4")
-
-        print(f"Height: {self.height_inches:.1f} Length: {self.length_feet:.1f} Radius: {self.radius_feet:.1f} Angle: {config.angle_degree} Theta: {self.theta_degree: .1f}")
-
-        self.stats = {
-            "height_feet": format_float(self.height_feet),
-            "height_inches": format_float(self.height_inches),
-            "length_feet": format_float(self.length_feet),
-            "length_inches": format_float(self.length_inches),
-            "radius_feet": format_float(self.radius_feet),
-            "radius_inches": format_float(self.radius_inches),
-            "takeoff_angle_degrees": format_float(self.config.angle_degree),
-            "takeoff_angle_radians": format_float(self.config.angle_radian),
-            "arclength_inches": format_float(self.config.angle_radian * self.radius_inches),
-            "arclength_feet": format_float(self.config.angle_radian * self.radius_feet),
-        }
+        self.color = BACKGROUND_COLOR
+        self.fill_width = self.line_width(CURVE_LINE_INCHES)
+        # Drawn onto when given, otherwise rasterize starts from new_canvas.
+        # Vector formats never rasterize, so they get no canvas.
+        self.image = image
 
-        print(json.dumps(self.stats))
+        if config.debug:
+            print(f"Height: {self.height_inches:.1f} Length: {self.length_feet:.1f} Radius: {self.radius_feet:.1f} Angle: {config.angle_degree} Theta: {self.theta_degree: .1f}")
+            print(json.dumps(self.stats))
 
     def compute_radius(self, angle_radian: float, height_inches: float):
-        print(f"in compute_radius height: {height_inches}")
-        if (angle_radian < 0 or angle_radian > math.pi / 2.0):
-            raise Exception(
-                f"Angle must be between 0 and pi / 4 radians. You gave ${angle_radian}")
-        theta = math.pi / 2.0 - angle_radian
-        r = height_inches / (1 - math.sin(theta))
-        l = r * math.cos(theta)
-        print("done compute_radius")
-        return [height_inches, l, r, theta]
+        return kicker_geometry(angle_radian, height_inches, None)
 
     def compute_height(self, angle_radian: float, radius_inches: float):
-        print("in compute_height")
-        if (angle_radian < 0 or angle_radian > math.pi / 2.0):
-            raise Exception(
-                f"Angle must be between 0 and pi / 4 radians. You gave ${angle_radian}")
-
-        theta = math.pi / 2.0 - angle_radian
-        h = radius_inches - radius_inches * math.sin(theta)
-        l = radius_inches * math.cos(theta)
-        print(f"Done computing height")
-        return [h, l, radius_inches, theta]
+        return kicker_geometry(angle_radian, None, radius_inches)
 
     def draw_image(self):
-        self.draw = ImageDraw.Draw(self.image)
+        self.display_list = self.new_display_list()
 
-        self.curve_points, self.curve_x, self.curve_y = self.compute_curve()
+        with self.metrics.timer("record"):
+            self.curve_points, self.curve_x, self.curve_y = self.compute_curve()
         self.render_grid()
-        self.draw.line(self.curve_points, fill='black', width=self.fill_width)
+        self.display_list.start_layer("curve")
+        with self.metrics.timer("record"):
+            self.display_list.line(self.curve_points, fill=CURVE_COLOR, width=self.fill_width)
 
         text_rows = [
             f"Height (ft): {self.stats['height_feet']}",
@@ -144,32 +153,42 @@ class Kicker(RampBase):
         if self.config.show_frame:
             self.draw_frame()
 
-    def save(self) -> str:
-        return self._create("Kicker", self.stats)
-
-    def compute_curve(self) -> tuple[tuple[float, float], list[float], list[float]]:
-        points = []
-        x = []
-        y = []
-        # import pdb; pdb.set_trace()
-
-        dt = (math.pi / 2 - self.theta_radian) / float(self.X)
-        for i in range(self.X):
-            theta = math.pi / 2 - dt * i
-            _x = self.inches(self.radius_inches * math.cos(theta)) + self.padding["left"]
-            _y = self.padding["top"] + self.inches(self.height_inches) - self.inches(self.radius_inches) + \
-                self.inches(self.radius_inches * math.sin(theta))
-            points.append((_x, _y))
-            x.append(_x)
-            y.append(_y)
-        return tuple(points), x, y
+        # Raster formats get self.image right away, vector ones never need it.
+        if not self.encoder.vector:
+            self.rasterize()
+
+    def save(self, id: Optional[str] = None) -> str:
+        return self._create("Kicker", self.stats, id)
+
+    def delete(self, id: str):
+        self._delete("Kicker", id)
+
+    def compute_curve(self) -> Tuple[List[float], np.ndarray, np.ndarray]:
+        # theta sweeps from the bottom of the circle (pi / 2) up to the lip.
+        x, y = arc_curve(
+            self.inches(self.radius_inches),
+            math.pi / 2,
+            self.theta_radian,
+            x_offset=self.padding["left"],
+            y_offset=self.padding["top"] + self.inches(self.height_inches) - self.inches(self.radius_inches)
+        )
+        return flatten(x, y), x, y
+
+    def compute_rungs(self) -> RungLayout:
+        return arc_rungs(self.radius_inches, self.config.angle_radian, self.config.rung_width)
+
+    def to_pixels(self, x_inches, y_inches):
+        x = self.padding["left"] + self.inches(x_inches)
+        y = self.padding["top"] + self.inches(self.height_inches) - self.inches(y_inches)
+        return x, y
 
+    @layer("frame")
     def draw_frame(self):
         width = 11 * self.config.pixels_per_inch
         mid = self.get_midpoint()
         
         # Bottom left beam
-        lt = (self.curve_x[0], self.curve_y[0])
+        lt = self.to_pixels(*self.profile.point_at(0.0))
         rt = (mid["x"], mid["y"])
         length = dist(lt, rt)
         angle_radian = math.atan((rt[1] - lt[1]) / (rt[0] - lt[0]))
@@ -180,7 +199,7 @@ class Kicker(RampBase):
 
         # Top right beam
         lt = (mid["x"], mid["y"])
-        rt = (self.curve_x[-1], self.curve_y[-1])
+        rt = self.to_pixels(*self.profile.point_at(self.profile.length))
         length = dist(lt, rt)
         angle_radian = math.atan((rt[1] - lt[1]) / (rt[0] - lt[0]))
         self.render_beam(lt, length, width, angle_radian)
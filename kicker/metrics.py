@@ -0,0 +1,97 @@
+"""
+Per request stage timing.
+
+A Metrics object collects how long each pipeline stage took and emits them as
+one CloudWatch Embedded Metric Format (EMF) record, a single JSON log line that
+CloudWatch turns into metrics without any API calls.
+
+Stages do not overlap, except "total" around everything and the upload and
+record write, which run at the same time. A render records
+the plan into a display list ("record"), allocates the canvas ("canvas") and
+draws it one layer at a time, each layer timed under its own name ("grid",
+"curve", "rungs", "frame", "text"), then encodes and uploads it
+("encode_upload") and writes the record ("db_write").
+"""
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+NAMESPACE = "MtbRamps"
+
+
+class Metrics():
+    def __init__(self, namespace: str = NAMESPACE, **dimensions):
+        """
+        dimensions: e.g. Function="kicker", every metric is recorded against them.
+        """
+        self.namespace = namespace
+        self.dimensions = dimensions
+        self.timings = {}
+        self.properties = {}
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Times the block in milliseconds. Repeated stages add up.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+
+    def put_property(self, name: str, value):
+        """
+        Extra context logged with the record but not turned into a metric.
+        """
+        self.properties[name] = value
+
+    def to_emf(self) -> dict:
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [list(self.dimensions.keys())],
+                    "Metrics": [{"Name": stage, "Unit": "Milliseconds"} for stage in self.timings]
+                }]
+            },
+            **self.dimensions,
+            **self.properties,
+            **{stage: round(ms, 3) for stage, ms in self.timings.items()}
+        }
+
+    def emit(self):
+        print(json.dumps(self.to_emf()))
+
+
+def timed(stage: str):
+    """
+    Decorates a RampBase method so its run time is recorded on self.metrics.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(stage):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def layer(name: str):
+    """
+    Decorates a RampBase method that records one layer of the plan. What it
+    adds to the display list is drawn, and timed, as stage name by rasterize.
+    Recording it is timed as "record".
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if self.display_list is not None:
+                self.display_list.start_layer(name)
+            with self.metrics.timer("record"):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
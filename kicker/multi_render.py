@@ -0,0 +1,122 @@
+"""
+Renders many ramp designs in parallel.
+
+Each design is drawn in its own process, so a catalog of rollers and kickers
+scales with cores. Results are written as individual files or composited onto
+one sheet.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from kicker import Kicker, KickerConfig
+from roller import Roller, RollerConfig
+
+RAMP_TYPES = {
+    KickerConfig: Kicker,
+    RollerConfig: Roller,
+}
+
+
+class RenderResult():
+    def __init__(self, filename: str, stats: dict, timings: dict, path: Optional[str] = None, image=None):
+        self.filename = filename
+        self.stats = stats
+        self.timings = timings
+        self.path = path
+        self.image = image
+
+
+def ramp_for(config):
+    for config_type, ramp_type in RAMP_TYPES.items():
+        if isinstance(config, config_type):
+            return ramp_type(config)
+    raise Exception(f"No ramp type for config {type(config).__name__}")
+
+
+def render_design(config, keep_image: bool = False, scale: float = 1.0) -> RenderResult:
+    """
+    Draws one design. Runs in a worker process so it must stay a top level function.
+
+    Writes the image to config.output_dir, or when keep_image is set returns the
+    image (resized by scale) for compositing instead.
+    """
+    timings = {}
+    start = time.perf_counter()
+    ramp = ramp_for(config)
+    timings["init"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    ramp.draw_image()
+    timings["draw"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    path = None
+    image = None
+    if keep_image:
+        if ramp.image is None:
+            raise Exception(f"{config.output_format} has no raster image to composite")
+        image = ramp.image
+        if scale != 1.0:
+            image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+    else:
+        path = ramp._save_image_local()
+    timings["save"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - start
+
+    return RenderResult(config.filename, ramp.stats, timings, path=path, image=image)
+
+
+class MultiRenderer():
+    def __init__(self, configs: list, workers: Optional[int] = None):
+        """
+        configs: any mix of KickerConfig and RollerConfig
+        workers: process count, defaults to the number of cores
+        """
+        self.configs = configs
+        self.workers = workers
+
+    def _map(self, keep_image: bool, scale: float) -> List[RenderResult]:
+        count = len(self.configs)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(render_design, self.configs, [keep_image] * count, [scale] * count))
+
+    def render_files(self) -> List[RenderResult]:
+        """
+        Renders every design to its own file.
+        """
+        return self._map(False, 1.0)
+
+    def render_sheet(self, out_path: str, columns: int = 1, scale: float = 1.0) -> List[RenderResult]:
+        """
+        Renders every design and composites them onto one sheet, `columns` wide,
+        in the order given. scale shrinks each design before it is sent back
+        from the worker, which keeps large catalogs within memory.
+        """
+        from PIL import Image
+
+        results = self._map(True, scale)
+        cell_width = max(r.image.width for r in results)
+        cell_height = max(r.image.height for r in results)
+        rows = (len(results) + columns - 1) // columns
+
+        sheet = Image.new('RGB', (cell_width * columns, cell_height * rows), 'white')
+        for i, result in enumerate(results):
+            sheet.paste(result.image, ((i % columns) * cell_width, (i // columns) * cell_height))
+            result.image = None
+
+        out_dir = os.path.dirname(out_path)
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        sheet.save(out_path)
+        for result in results:
+            result.path = out_path
+        return results
+
+    @staticmethod
+    def report(results: List[RenderResult]):
+        print(f"{'design':<32} {'init (s)':>9} {'draw (s)':>9} {'save (s)':>9} {'total (s)':>10}")
+        for r in results:
+            t = r.timings
+            print(f"{r.filename:<32} {t['init']:>9.3f} {t['draw']:>9.3f} {t['save']:>9.3f} {t['total']:>10.3f}")
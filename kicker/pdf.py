@@ -0,0 +1,140 @@
+"""
+PDF backend, writes a DisplayList as vectors at full scale for printing.
+
+Only the handful of PDF operators the ramps need are written by hand (lines,
+colours and Helvetica text), so there is no extra dependency. A page is sized
+so one inch of ramp is one printed inch.
+"""
+import zlib
+from math import ceil
+from typing import List, Optional, Sequence, Tuple
+
+from display_list import DisplayList, Line, Segments, Text, point_pairs, rgb
+
+POINTS_PER_INCH = 72.0
+# Acrobat's limit for a page side in default user units (200 inches). Larger
+# pages are written with /UserUnit so they still print at full scale.
+MAX_PAGE_UNITS = 14400.0
+# Helvetica's ascender as a fraction of the font size, Pillow places text by
+# its top and PDF by its baseline.
+TEXT_ASCENT = 0.72
+
+
+def _number(value: float) -> str:
+    return f"{float(value):.3f}".rstrip("0").rstrip(".")
+
+
+def _pdf_string(text: str) -> str:
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _color(fill, operator: str) -> str:
+    r, g, b = rgb(fill)
+    return f"{_number(r / 255.0)} {_number(g / 255.0)} {_number(b / 255.0)} {operator}"
+
+
+def page_content(display_lists: List[DisplayList], scale: float, origin: Tuple[float, float],
+                 size: Tuple[float, float], margin: float = 0.0) -> bytes:
+    """
+    Content stream for the region of the display lists at origin with size
+    (pixels), drawn in order and clipped to the region. scale is page units per
+    pixel and margin is the blank border around the region in page units.
+    """
+    ox, oy = origin
+    width, height = size
+    page_height = height * scale + 2 * margin
+    rows = [
+        # Flip y and scale so the display list's pixel coordinates can be used as is.
+        f"{_number(scale)} 0 0 {_number(-scale)} {_number(margin - ox * scale)} "
+        f"{_number(page_height - margin + oy * scale)} cm",
+        f"{_number(ox)} {_number(oy)} {_number(width)} {_number(height)} re W n",
+        "0 J 0 j",
+    ]
+    background = display_lists[0].background
+    if background:
+        rows.append(f"{_color(background, 'rg')} {_number(ox)} {_number(oy)} {_number(width)} {_number(height)} re f")
+    for display_list in display_lists:
+        for item in display_list.items:
+            if isinstance(item, Line):
+                points = point_pairs(item.xy)
+                path = [f"{_number(points[0][0])} {_number(points[0][1])} m"]
+                path.extend(f"{_number(x)} {_number(y)} l" for x, y in points[1:])
+                rows.append(f"{_color(item.fill, 'RG')} {_number(item.width)} w " + " ".join(path) + " S")
+            elif isinstance(item, Segments):
+                path = " ".join(f"{_number(x0)} {_number(y0)} m {_number(x1)} {_number(y1)} l"
+                                for x0, y0, x1, y1 in item.segments.reshape(-1, 4).tolist())
+                rows.append(f"{_color(item.fill, 'RG')} {_number(item.width)} w {path} S")
+            elif isinstance(item, Text):
+                x, y = item.xy
+                baseline = y + item.font_size * TEXT_ASCENT
+                # The text matrix flips y back so glyphs are upright.
+                rows.append(f"BT {_color(item.fill, 'rg')} /F1 {_number(item.font_size)} Tf "
+                            f"1 0 0 -1 {_number(x)} {_number(baseline)} Tm {_pdf_string(item.text)} Tj ET")
+    return "\n".join(rows).encode("latin-1")
+
+
+class PdfWriter():
+    """
+    writer = PdfWriter()
+    writer.add_page(display_list, pixels_per_inch)
+    writer.save(fp)
+    """
+
+    def __init__(self):
+        self.pages = []
+
+    def add_page(self, display_list: DisplayList, pixels_per_inch: float,
+                 origin: Tuple[float, float] = (0, 0), size: Optional[Tuple[float, float]] = None,
+                 margin_inches: float = 0.0, overlays: Sequence[DisplayList] = ()):
+        """
+        Adds the region of display_list at origin with size (pixels) as one
+        page, by default the whole canvas, with a blank margin around it.
+        overlays are drawn on top in the same coordinates, e.g. registration marks.
+        """
+        width, height = size if size else display_list.size
+        scale = POINTS_PER_INCH / pixels_per_inch
+        margin = margin_inches * POINTS_PER_INCH
+        user_unit = max(1, ceil((max(width, height) * scale + 2 * margin) / MAX_PAGE_UNITS))
+        scale = scale / user_unit
+        margin = margin / user_unit
+        page_width = width * scale + 2 * margin
+        page_height = height * scale + 2 * margin
+        content = zlib.compress(page_content([display_list, *overlays], scale, origin, (width, height), margin))
+        self.pages.append((page_width, page_height, user_unit, content))
+
+    def save(self, fp):
+        # Objects 1-3 are fixed, each page adds a page and a content object.
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        ]
+        kids = []
+        for page_width, page_height, user_unit, content in self.pages:
+            page_id = len(objects) + 1
+            kids.append(f"{page_id} 0 R")
+            unit = f" /UserUnit {user_unit}" if user_unit > 1 else ""
+            objects.append((
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_number(page_width)} {_number(page_height)}]{unit} "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>").encode("latin-1"))
+            objects.append(
+                f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("latin-1") + content + b"\nendstream")
+        objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+        out = bytearray(b"%PDF-1.6\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(objects):
+            offsets.append(len(out))
+            out += f"{i + 1} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode("latin-1")
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+        fp.write(bytes(out))
+
+
+def write_pdf(display_list: DisplayList, pixels_per_inch: float, fp):
+    writer = PdfWriter()
+    writer.add_page(display_list, pixels_per_inch)
+    writer.save(fp)
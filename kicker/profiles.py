@@ -0,0 +1,157 @@
+"""
+Ramp profiles as analytic curves.
+
+A profile is the riding surface of a ramp in inches, in the ramp's own frame
+(origin at the start of the curve, y up), parametrized by the distance s
+travelled along it. Frame, rung and stats code query points, tangents and
+curvature directly instead of sampling the curve into pixels and scanning it.
+
+Every method takes a scalar or an array and broadcasts:
+
+    profile = ArcProfile(radius_inches=120, angle_radian=0.96)
+    x, y = profile.point_at(profile.length / 2)
+    angle = profile.tangent_at([0, profile.length])
+"""
+from math import pi
+
+import numpy as np
+
+from curve import MIN_SEGMENTS
+
+# Gauss-Legendre rule for the roller's arc length integral over at most half a
+# period, exact to rounding for the slopes ramps have.
+QUADRATURE_NODES, QUADRATURE_WEIGHTS = np.polynomial.legendre.leggauss(32)
+# Newton steps when inverting the arc length, each one doubles the digits
+NEWTON_STEPS = 6
+
+
+def sine_partial_length(u, k, amplitude):
+    """
+    Arc length of y = amplitude * (1 - cos(k x)) from 0 to u, for u within
+    one half period. Broadcasts over u, k and amplitude, so it measures many
+    rollers at once.
+    """
+    u = np.asarray(u, dtype=np.float64)[..., None]
+    k = np.asarray(k, dtype=np.float64)[..., None]
+    amplitude = np.asarray(amplitude, dtype=np.float64)[..., None]
+    t = u / 2.0 * (QUADRATURE_NODES + 1.0)
+    speed = np.sqrt(1.0 + (amplitude * k * np.sin(k * t)) ** 2)
+    return (u[..., 0] / 2.0) * (speed * QUADRATURE_WEIGHTS).sum(axis=-1)
+
+
+def sine_arclength(length_inches, height_inches):
+    """
+    Arc length of a whole SineProfile, two half periods. Broadcasts like
+    sine_partial_length.
+    """
+    length_inches = np.asarray(length_inches, dtype=np.float64)
+    return 2.0 * sine_partial_length(length_inches / 2.0, 2.0 * pi / length_inches,
+                                     np.asarray(height_inches, dtype=np.float64) / 2.0)
+
+
+class ArcProfile():
+    """
+    A kicker: a circular arc of radius_inches from the bottom of the circle up
+    to the takeoff angle_radian.
+    """
+
+    def __init__(self, radius_inches: float, angle_radian: float):
+        self.radius = radius_inches
+        self.angle = angle_radian
+        self.length = radius_inches * angle_radian
+        self.span = radius_inches * np.sin(angle_radian)
+        self.height = radius_inches * (1.0 - np.cos(angle_radian))
+
+    def point_at(self, s):
+        phi = np.asarray(s, dtype=np.float64) / self.radius
+        return self.radius * np.sin(phi), self.radius * (1.0 - np.cos(phi))
+
+    def tangent_at(self, s):
+        """
+        Angle of the direction of travel above horizontal, radians.
+        """
+        return np.asarray(s, dtype=np.float64) / self.radius
+
+    def curvature_at(self, s):
+        """
+        Signed curvature in 1 / inches, positive where the ramp bends upward.
+        """
+        return np.full(np.shape(s), 1.0 / self.radius)
+
+    def s_at_x(self, x):
+        return self.radius * np.arcsin(np.asarray(x, dtype=np.float64) / self.radius)
+
+
+class SineProfile():
+    """
+    A roller: y = height / 2 * (1 - cos(2 pi x / length)) for x in [0, length].
+    """
+
+    def __init__(self, length_inches: float, height_inches: float):
+        self.span = length_inches
+        self.height = height_inches
+        self.k = 2.0 * pi / length_inches
+        self.amplitude = height_inches / 2.0
+        # The speed |d(x, y)/dx| repeats every half period, so s(x) is a whole
+        # number of half periods plus one integral over less than half a period.
+        self.half_period = length_inches / 2.0
+        self.half_length = float(self._partial_length(self.half_period))
+        self.length = 2.0 * self.half_length
+
+    def _dy_dx(self, x):
+        return self.amplitude * self.k * np.sin(self.k * x)
+
+    def _speed(self, x):
+        return np.sqrt(1.0 + self._dy_dx(x) ** 2)
+
+    def _partial_length(self, u):
+        """
+        Arc length from 0 to u, for u within one half period.
+        """
+        return sine_partial_length(u, self.k, self.amplitude)
+
+    def s_at_x(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        periods = np.floor(x / self.half_period)
+        return periods * self.half_length + self._partial_length(x - periods * self.half_period)
+
+    def x_at_s(self, s):
+        """
+        Inverse of s_at_x, by Newton's method from the linear estimate. ds/dx is
+        at least 1 and smooth, so a fixed number of steps converges everywhere.
+        """
+        s = np.asarray(s, dtype=np.float64)
+        periods = np.floor(s / self.half_length)
+        rest = s - periods * self.half_length
+        u = rest / self.half_length * self.half_period
+        for _ in range(NEWTON_STEPS):
+            u = np.clip(u - (self._partial_length(u) - rest) / self._speed(u), 0.0, self.half_period)
+        return periods * self.half_period + u
+
+    def point_at(self, s):
+        x = self.x_at_s(s)
+        return x, self.amplitude * (1.0 - np.cos(self.k * x))
+
+    def polyline(self, tolerance: float):
+        """
+        Points evenly spaced along the profile, close enough that every chord
+        stays within tolerance inches of it. A chord of arc length h sags
+        h^2 * curvature / 8, and the curvature peaks at amplitude * k^2.
+        """
+        step = np.sqrt(8.0 * tolerance / (self.amplitude * self.k ** 2))
+        count = max(MIN_SEGMENTS, int(np.ceil(self.length / step)))
+        return self.point_at(np.linspace(0.0, self.length, count + 1))
+
+    def tangent_at(self, s):
+        """
+        Angle of the direction of travel above horizontal, radians.
+        """
+        return np.arctan(self._dy_dx(self.x_at_s(s)))
+
+    def curvature_at(self, s):
+        """
+        Signed curvature in 1 / inches, positive where the ramp bends upward.
+        """
+        x = self.x_at_s(s)
+        d2y = self.amplitude * self.k ** 2 * np.cos(self.k * x)
+        return d2y / (1.0 + self._dy_dx(x) ** 2) ** 1.5
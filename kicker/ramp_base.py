@@ -1,25 +1,47 @@
 
-import io
 import json
 import os
 import uuid
-from decimal import Decimal
-from math import atan, cos, floor, pi, sin, sqrt
-from typing import List, Tuple
-
-import boto3
-from boto3.dynamodb.types import TypeSerializer
-
-serializer = TypeSerializer()
-
-from PIL import Image, ImageDraw, ImageFont
-
-LINE_WIDTH = 100
-LINE_WIDTH_THIN = 5
+from concurrent.futures import ThreadPoolExecutor
+from math import floor, pi, sqrt, tan
+from typing import List, Optional, Sequence, Tuple
+
+from aws import BUCKET_NAME, REGION, get_client, get_table, to_dynamodb
+from display_list import DisplayList
+from encoders import DEFAULT_FORMAT, Encoder, get_encoder, output_filename
+from metrics import Metrics, layer, timed
+from raster import CANVAS_MODES, draw_display_list, new_image
+from rungs import RungLayout
+from stream_upload import FileSink, S3Sink, StreamingUpload
+from transform import MatrixStack
+from utils import function_memory_bytes
+
+# Resolution policy, see BaseConfig.fit_resolution
+DEFAULT_PIXELS_PER_INCH = 20
+# Memory a render can not use: the interpreter with NumPy, Pillow and the boto3
+# clients measures ~67 MB, fonts, the display list and upload buffers a few more.
+RUNTIME_RESERVE_BYTES = 80 * 1024 * 1024
+# Blank border on every side of the plan
+PADDING_INCHES = 12.0
+# Line widths in inches so plans look the same at any resolution
+CURVE_LINE_INCHES = 0.5
+THIN_LINE_INCHES = 0.25
+RUNG_LINE_INCHES = 2.5
+# What each part of a plan is drawn in, names from display_list.COLORS so
+# every canvas mode and backend can map them.
+BACKGROUND_COLOR = 'white'
+CURVE_COLOR = 'black'
+GRID_COLOR = 'grey'
+TEXT_COLOR = 'black'
+RUNG_COLOR = 'red'
+FRAME_COLOR = 'red'
 TO_DEGREES = 180.0 / pi
 TO_RADIANS = pi / 180.0
-
-
+# Part of every cache key, bump it when a change alters how plans are drawn so
+# renders cached by older code are not served again.
+RENDER_VERSION = 3
+# Characters of the cache key in object names, see BaseConfig.keyed_filename
+FILENAME_KEY_CHARS = 16
 
 
 def format_float(f: float):
@@ -41,33 +63,113 @@ def degree_to_radian(degrees: float) -> float:
     return degrees * TO_RADIANS
 
 
-BUCKET_NAME = "mtb-ramps"
+def render_budget(concurrent_renders: int = 1) -> Optional[int]:
+    """
+    Bytes one render can use for its canvas and encoding: the function's
+    memory less the runtime, shared by the renders that run at once. None
+    outside Lambda, local renders are only limited by the machine.
+    """
+    memory = function_memory_bytes()
+    if memory is None:
+        return None
+    free = memory - RUNTIME_RESERVE_BYTES
+    return max(0, free // concurrent_renders)
+
+
+def batch_create(table_name: str, items: List[dict]) -> List[str]:
+    """
+    Writes many stats dicts in as few batch_write_item calls as possible.
+    Items without an "id" get a random one. Returns the ids in order.
+    """
+    table = get_table(table_name)
+    ids = []
+    with table.batch_writer(overwrite_by_pkeys=["id"]) as batch:  # type: ignore
+        for stats in items:
+            payload = {**stats, "id": stats.get("id") or str(uuid.uuid4())}
+            batch.put_item(Item=to_dynamodb(payload))
+            ids.append(payload["id"])
+    return ids
 
 
 class BaseConfig():
-    def __init__(self, filename: str, output_dir: str = "output", pixels_per_inch=100, mode='RGB', show_frame=True, add_text=True, rung_width: float = 5.5, debug=False):
+    def __init__(self, filename: str, output_dir: str = "output", pixels_per_inch=None, mode=None, show_frame=True, add_text=True, rung_width: float = 5.5, debug=False,
+                 output_format: str = DEFAULT_FORMAT, max_pixels: Optional[int] = None,
+                 max_bytes: Optional[int] = None, target_width: Optional[int] = None):
         self.output_dir = output_dir
         self.filename = filename
+        # One of encoders.ENCODERS
+        self.output_format = output_format
+        get_encoder(output_format)
 
         self.rung_width = rung_width
-        self.pixels_per_inch = pixels_per_inch
-        self.mode = mode
+        self.requested_pixels_per_inch = pixels_per_inch
+        self.pixels_per_inch = pixels_per_inch if pixels_per_inch else DEFAULT_PIXELS_PER_INCH
+        self.max_pixels = max_pixels
+        # Memory for the canvas and encoding it, render_budget() by default,
+        # which is no limit outside Lambda
+        self.max_bytes = max_bytes if max_bytes else render_budget()
+        self.target_width = target_width
+        # RGB, or P, L and 1 for a third of the canvas memory. By default the
+        # output format's canvas_mode, see encoders.py.
+        self.mode = mode if mode else get_encoder(output_format).canvas_mode
+        if self.mode not in CANVAS_MODES:
+            raise Exception(f"mode must be one of {', '.join(CANVAS_MODES)}. You gave {self.mode}")
         self.show_frame = show_frame
         self.add_text = add_text
         self.debug = debug
 
+    def fit_resolution(self, width_inches: float, height_inches: float) -> float:
+        """
+        Picks pixels_per_inch for a canvas of width x height inches, padding
+        included. target_width (pixels) wins over pixels_per_inch, which wins
+        over DEFAULT_PIXELS_PER_INCH, and the result is lowered until drawing
+        and encoding the canvas fits in max_bytes and max_pixels, when set,
+        so memory and encode time stay bounded. What a pixel costs depends on
+        the canvas mode and the encoder, see Encoder.bytes_per_pixel.
+        """
+        if self.target_width:
+            ppi = floor(self.target_width / width_inches * 100) / 100.0
+        elif self.requested_pixels_per_inch:
+            ppi = self.requested_pixels_per_inch
+        else:
+            ppi = DEFAULT_PIXELS_PER_INCH
+
+        limits = [self.max_pixels] if self.max_pixels else []
+        bytes_per_pixel = get_encoder(self.output_format).bytes_per_pixel(self.mode)
+        if bytes_per_pixel and self.max_bytes is not None:
+            limits.append(self.max_bytes / bytes_per_pixel)
+        max_pixels = min(limits) if limits else None
+        if max_pixels and width_inches * height_inches * ppi**2 > max_pixels:
+            # Round down to keep under the budget and the cache key stable.
+            ppi = floor(sqrt(max_pixels / (width_inches * height_inches)) * 100) / 100.0
+        self.pixels_per_inch = ppi
+        return ppi
+
+    def cache_key(self) -> str:
+        raise NotImplemented("Must be implemented by subclass.")
+
+    def keyed_filename(self, stem: str) -> str:
+        """
+        stem with the start of cache_key appended, so configs that render
+        differently never share an object and a cached url always points at
+        the plan it was cached for. Call once every field of the key is set.
+        """
+        return output_filename(f"{stem}_{self.cache_key()[:FILENAME_KEY_CHARS]}", self.output_format)
+
 class RampBase():
 
-    def __init__(self, config: BaseConfig):
+    def __init__(self, config: BaseConfig, metrics: Optional[Metrics] = None):
         self.env = os.getenv("ENV")
+        self.config = config
+        # Stage timings for this render, see metrics.py
+        self.metrics = metrics if metrics else Metrics()
         self.padding = {
-            "top": floor(self.inches(12.0 * 1)),
-            "bottom": floor(self.inches(12.0 * 1)),
-            "right": floor(self.inches(12.0 * 1)),
-            "left": floor(self.inches(12.0 * 1))
+            "top": floor(self.inches(PADDING_INCHES)),
+            "bottom": floor(self.inches(PADDING_INCHES)),
+            "right": floor(self.inches(PADDING_INCHES)),
+            "left": floor(self.inches(PADDING_INCHES))
         }
 
-        self.config = config
         self.stats = {}
         self.out_path = "output"
 
@@ -80,9 +182,49 @@ class RampBase():
         self.curve_y = [0]
         self.curve_points = []
 
-        # The image object, will be instantiated by the subclass
-        self.image = Image.new(mode="RGB", size=(1, 1))
-        self.draw = ImageDraw.Draw(self.image)
+        # The rung cut list, computed from geometry by compute_rungs
+        self.rungs = None
+        # The riding surface in inches, see profiles.py
+        self.profile = None
+
+        # What draw_image draws, backends in encoders.py turn it into files
+        self.display_list = None
+        # The raster canvas, allocated by the subclass or by rasterize
+        self.image = None
+        self.rasterized_count = 0
+
+    @property
+    def encoder(self) -> Encoder:
+        return get_encoder(self.config.output_format)
+
+    def new_display_list(self) -> DisplayList:
+        return DisplayList(self.size, self.color)
+
+    def rasterize(self):
+        """
+        Draws the display list onto self.image and returns it. Only items added
+        since the last call are drawn, so it is cheap to call again. Each
+        layer is timed under its name, see metrics.layer.
+        """
+        if self.display_list is None:
+            raise Exception("Call draw_image before rasterize")
+        if self.image is None:
+            self.image = self.new_canvas()
+        for name, start, end in self.display_list.layers(self.rasterized_count):
+            with self.metrics.timer(name):
+                draw_display_list(self.display_list, self.image, start=start, end=end)
+        self.rasterized_count = len(self.display_list)
+        return self.image
+
+    def new_canvas(self):
+        """
+        A blank canvas in the configured mode, the grid is drawn on it with the
+        rest of the display list.
+        """
+        with self.metrics.timer("canvas"):
+            image = new_image(self.display_list, self.mode)
+        self.rasterized_count = 0
+        return image
 
     def draw_image(self):
         raise NotImplemented("Must be implemented by subclass.")
@@ -94,17 +236,17 @@ class RampBase():
         """
         raise NotImplemented()
 
-    def compute_curve(self) -> Tuple[List[Tuple[float, float]], List[float], List[float]]:
+    def compute_curve(self) -> Tuple[List[float], Sequence[float], Sequence[float]]:
         raise NotImplemented("Must be implemented by subclass.")
 
+    @layer("text")
     def add_text(self, rows: List[str], position: str = "top"):
-        if not self.draw:
+        if self.display_list is None:
             raise Exception(
-                "You must instantiate self.draw as an instance of Image.draw()")
-        font_size = self.config.pixels_per_inch * 2
+                "You must instantiate self.display_list, see new_display_list()")
+        font_size = self.font_size(2.0)
         row_height = self.inches(2)
         padding_vert = self.inches(2.5)
-        font = ImageFont.truetype("Yagora.ttf", font_size)
 
         for i, row in enumerate(rows):
             x = self.X * .1
@@ -113,8 +255,9 @@ class RampBase():
             else:
                 y = self.Y - len(rows) * row_height - \
                     padding_vert + i * row_height
-            print("Adding text {0}".format(row))
-            self.draw.text((x, y), row, (0, 0, 0), font=font)
+            if self.config.debug:
+                print("Adding text {0}".format(row))
+            self.display_list.text((x, y), row, TEXT_COLOR, font_size=font_size)
 
     def inches(self, inches: float):
         """
@@ -122,130 +265,127 @@ class RampBase():
         """
         return inches * self.config.pixels_per_inch
 
+    def line_width(self, inches: float) -> int:
+        return max(1, round(self.inches(inches)))
+
+    def font_size(self, inches: float) -> int:
+        return max(1, round(self.inches(inches)))
+
     def pixel_to_inch(self, pixels: float) -> float:
         return pixels / self.config.pixels_per_inch / 12.0
 
+    @layer("grid")
     def render_grid(self):
-        if not self.draw:
+        if self.display_list is None:
             raise Exception(
-                "You must instantiate self.draw as an instance of Image.draw()")
+                "You must instantiate self.display_list, see new_display_list()")
         delta_x = 12.0 * self.config.pixels_per_inch
         delta_y = delta_x
-        font = ImageFont.truetype("Yagora.ttf", int(
-            self.config.pixels_per_inch * 1.5))
+        font_size = self.font_size(1.5)
+        line_width = self.line_width(THIN_LINE_INCHES)
         while delta_x < self.X:
             label_ft = delta_x / 12.0 / self.config.pixels_per_inch
             label = f"{label_ft:.0f} (ft) [{delta_x}]"
             x = delta_x + self.padding["left"]
-            self.draw.line([(x, 0), (x, self.Y)],
-                           fill='grey', width=LINE_WIDTH_THIN)
-            self.draw.text((x + 20, delta_y * 0.05),
-                           label, (0, 0, 0), font=font)
+            self.display_list.line([(x, 0), (x, self.Y)],
+                                   fill=GRID_COLOR, width=line_width)
+            self.display_list.text((x + self.inches(1.0), delta_y * 0.05),
+                                   label, TEXT_COLOR, font_size=font_size)
             delta_x = delta_x + 12.0 * self.config.pixels_per_inch
 
         while delta_y <= self.Y:
             y = delta_y + self.padding["bottom"]
             label_ft = (self.Y - delta_y) / 12.0 / self.config.pixels_per_inch
             label = f"{label_ft:.0f} (ft) [{y}]"
-            self.draw.line([(0, y), (self.X, y)],
-                           fill='grey', width=LINE_WIDTH_THIN)
-            self.draw.text((20, y), label, (0, 0, 0), font=font)
+            self.display_list.line([(0, y), (self.X, y)],
+                                   fill=GRID_COLOR, width=line_width)
+            self.display_list.text((self.inches(1.0), y), label, TEXT_COLOR, font_size=font_size)
             delta_y = delta_y + 12.0 * self.config.pixels_per_inch
 
-    def rotate(self, point, angle):
-        out = (
-            point[0] * cos(angle) - point[1] * sin(angle),
-            point[1] * cos(angle) + point[0] * sin(angle)
-        )
-        print("point ", point)
-        print("rotated ", out)
-        return out
-
-    def translate(self, point, anchor):
-        return (point[0] + anchor[0], point[1] + anchor[1])
-
     def render_beam(self, anchor: Tuple[float, float], length_pixels: float, width_pixels: float, angle_radians: float):
-        """_summary_
-        All coordinates are in pixels
+        """
+        Outlines a beam as one closed polygon. All coordinates are in pixels.
 
         Args:
-            anchor (Tuple[float, float]): _description_ Top left corner of the beam
-            length_pixels (float): _description_
-            width_pixels (float): _description_
-            angle_radians (float): _description_
+            anchor (Tuple[float, float]): Top left corner of the beam
+            length_pixels (float): Along the beam, negative to extend to the left
+            width_pixels (float): Across the beam
+            angle_radians (float): Rotation about the anchor
         """
-        length_pixels = length_pixels  # self.inches(length_pixels)
-        width_pixels = width_pixels  # self.inches(width_pixels)
-
-        points = [
-            (0, 0),
-            (length_pixels, 0),
-            (length_pixels, width_pixels),
-            (0, width_pixels)
-        ]
-
-        print(f"X: {self.X}, Y: {self.Y}")
-        # rotate
-        points = [self.rotate(p, angle_radians) for p in points]
-
-        # translate
-        points = [self.translate(p, anchor) for p in points]
-
-        self.draw.line([points[0], points[1]],
-                       fill='red', width=LINE_WIDTH_THIN)
-        self.draw.line([points[1], points[2]],
-                       fill='red', width=LINE_WIDTH_THIN)
-        self.draw.line([points[2], points[3]],
-                       fill='red', width=LINE_WIDTH_THIN)
-        self.draw.line([points[3], points[0]],
-                       fill='red', width=LINE_WIDTH_THIN)
+        stack = MatrixStack().translate(*anchor).rotate(angle_radians)
+        corners = stack.apply([(0, 0), (length_pixels, 0), (length_pixels, width_pixels), (0, width_pixels)])
+        if self.config.debug:
+            print(f"[render_beam] corners {corners.tolist()}")
+        self.display_list.polygon(corners.tolist(), fill=FRAME_COLOR, width=self.line_width(THIN_LINE_INCHES))
 
-    def add_rungs(self) -> int:
-        """
-        Start at the left bottom of the curve.
-        Loop until the next point is greater than the rung width, then end rung.
-        Continue looping until you are past the gap_width, then start a new rung.
+    def compute_rungs(self) -> RungLayout:
+        raise NotImplemented("Must be implemented by subclass.")
 
+    def to_pixels(self, x_inches, y_inches):
+        """
+        Converts ramp coordinates in inches (origin at the start of the curve, y up)
+        to canvas pixels. Works on scalars or arrays.
+        """
+        raise NotImplemented("Must be implemented by subclass.")
 
+    @layer("rungs")
+    def add_rungs(self) -> int:
+        """
+        Draws the rungs from the layout returned by compute_rungs.
         """
-        rung_count = 0
-        p1 = (self.curve_x[0], self.curve_y[0])
-        in_gap = False
-        for i in range(self.X):
-            p2 = (self.curve_x[i], self.curve_y[i])
-            if in_gap:
-                if dist(p1, p2) > self.inches(1.5):
-                    in_gap = False
-                    p1 = p2
-
-            # Not in the gap, check if I am the end of a rung.
-            elif dist(p1, p2) > self.inches(self.config.rung_width):
-                in_gap = True
-                self.draw.line([p1, p2], fill='red', width=50)
-                rung_count = rung_count + 1
-                p1 = p2
-
-        self.stats.update({"rung_count": rung_count})
-        return rung_count
-
-    def _create(self, table_name: str, stats) -> str:
+        if self.rungs is None:
+            self.rungs = self.compute_rungs()
+        rungs = self.rungs
+        start_x, start_y = self.to_pixels(rungs.start_x, rungs.start_y)
+        end_x, end_y = self.to_pixels(rungs.end_x, rungs.end_y)
+        self.display_list.segments(start_x, start_y, end_x, end_y, fill=RUNG_COLOR, width=self.line_width(RUNG_LINE_INCHES))
+
+        self.stats.update(rungs.to_dict())
+        return rungs.count
+
+    @timed("db_write")
+    def _create(self, table_name: str, stats, id: Optional[str] = None) -> str:
         # if self.env == "local":
         #     print("Env is local so doing nothing.")
         #     return ""
 
-        db = boto3.resource(
-            'dynamodb',
-            region_name="us-west-2"
-        )
-        table = db.Table(table_name)  # type: ignore
-        payload = {**stats, "id": str(uuid.uuid4())}
-        item = json.loads(json.dumps(payload), parse_float=Decimal)
-        table.put_item(  # type: ignore
-            Item=item
-        )
-        
+        payload = {**stats, "id": id if id else str(uuid.uuid4())}
+        get_table(table_name).put_item(Item=to_dynamodb(payload))  # type: ignore
         return payload["id"]
 
+    @timed("db_write")
+    def _delete(self, table_name: str, id: str):
+        get_table(table_name).delete_item(Key={"id": id})  # type: ignore
+
+    def save(self, id: Optional[str] = None) -> str:
+        raise NotImplemented("Must be implemented by subclass.")
+
+    def delete(self, id: str):
+        raise NotImplemented("Must be implemented by subclass.")
+
+    def persist(self, id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Uploads the image and saves the stats with its url at the same time,
+        so the request waits for the slower of the two calls, returns
+        (url, id). The url is known before the upload. If the upload fails
+        the record is deleted again and the upload's error is raised, so no
+        record is left pointing at a missing image.
+        """
+        url = self.image_url
+        self.stats.update({"url": url})
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            saved = pool.submit(self.save, id)
+            try:
+                self.save_image()
+            except Exception:
+                if saved.exception() is None:
+                    try:
+                        self.delete(saved.result())
+                    except Exception as e:
+                        print(f"Could not delete the record {saved.result()} of a failed upload: {e}")
+                raise
+        return url, saved.result()
+
     def save_image(self):
         return self._save_image_s3()
         # if self.env == "local":
@@ -254,45 +394,43 @@ class RampBase():
         #     return self._save_image_s3
 
     def _save_image_s3(self):
-        s3 = boto3.client('s3')
-        io_stream = io.BytesIO()
-        self.image.save(io_stream, format="PNG")
-        io_stream.seek(0)
-
-        s3.upload_fileobj(
-            io_stream,  # This is what i am trying to upload
-            BUCKET_NAME,
-            self.out_path,
-            ExtraArgs={
-                'ACL': 'public-read'
-            }
-        )
-        url = f"https://{BUCKET_NAME}.s3.us-west-2.amazonaws.com/{self.out_path}"
+        encoder = self.encoder
+        sink = S3Sink(get_client('s3'), BUCKET_NAME, self.out_path,
+                      {'ACL': 'public-read', 'ContentType': encoder.content_type})
+        # Encoding and upload overlap, so they are timed as one stage.
+        with self.metrics.timer("encode_upload"):
+            with StreamingUpload(sink) as stream:
+                encoder.save(self, stream)
+        url = self.image_url
         self.stats.update({"url": url})
 
         return url
 
+    @property
+    def image_url(self) -> str:
+        return f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{self.out_path}"
+
     def _save_image_local(self):
-        if not os.path.exists(self.config.output_dir):
-            # Create path
-            os.makedirs(self.config.output_dir)
-        self.image.save(self.out_path)
+        with StreamingUpload(FileSink(self.out_path)) as stream:
+            self.encoder.save(self, stream)
         return self.out_path
 
     def get_midpoint(self):
-        if len(self.curve_x) < 3 or len(self.curve_y) < 3:
-            raise Exception(
-                "curve_x or curve_y is not long enough to compute midpoint.")
-        index = floor(len(self.curve_x) / 2)
-        rise = self.curve_y[index + 1] - self.curve_y[index - 1]
-        run = self.curve_x[index + 1] - self.curve_x[index - 1]
-        slope = rise / run
-        angle_radian = atan(slope)
+        """
+        The point half way along the profile in canvas pixels, with the slope
+        of the curve there (y down like the canvas).
+        """
+        if self.profile is None:
+            raise Exception("The ramp has no profile to compute the midpoint from.")
+        s = self.profile.length / 2.0
+        x, y = self.to_pixels(*self.profile.point_at(s))
+        angle_radian = -float(self.profile.tangent_at(s))
+        slope = tan(angle_radian)
         angle_degree = radian_to_degree(angle_radian)
-        
+
         out = {
-            "x": self.curve_x[index],
-            "y": self.curve_y[index],
+            "x": float(x),
+            "y": float(y),
             "slope": slope,
             "radians": angle_radian,
             "angle_degree": angle_degree
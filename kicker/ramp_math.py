@@ -1,8 +1,14 @@
 
 import json
+from functools import lru_cache
 from math import atan, cos, pi, sin
+from typing import Dict, List, Optional, Sequence
 
-from utils import degree_to_radian, dist, format_float, radian_to_degree
+import numpy as np
+
+from rungs import DEFAULT_GAP, arc_rung_count, arc_rungs
+from utils import (TO_DEGREES, TO_RADIANS, degree_to_radian, dist, format_float,
+                   radian_to_degree)
 
 
 def kicker_from_angle_and_height(angle: float, height: float):
@@ -62,6 +68,157 @@ def common(r, l, h, theta):
     return out
 
 
+def kicker_arrays(angle_degree, height_inches=None, radius_inches=None) -> Dict[str, np.ndarray]:
+    """
+    The quantities of `common` for many kickers at once, in closed form.
+
+    angle_degree: takeoff angles
+    height_inches or radius_inches: the other dimension, radius wins if both are given
+
+    Inputs are scalars or arrays and broadcast against each other. Returns
+    unrounded float64 columns, lengths in inches and angles in degrees:
+    angle, height, length, radius, arclength, mid_x, mid_y, board_length,
+    curve_depth_major, curve_depth_minor and join_angle.
+    """
+    angle_degree = np.asarray(angle_degree, dtype=np.float64)
+    angle_radian = angle_degree * TO_RADIANS
+    if np.any((angle_radian <= 0) | (angle_radian > pi / 2.0)):
+        raise Exception("Angles must be greater than 0 and at most 90 degrees.")
+
+    if radius_inches is not None:
+        angle_radian, r = np.broadcast_arrays(angle_radian, np.asarray(radius_inches, dtype=np.float64))
+        h = r * (1.0 - np.cos(angle_radian))
+    elif height_inches is not None:
+        angle_radian, h = np.broadcast_arrays(angle_radian, np.asarray(height_inches, dtype=np.float64))
+        r = h / (1.0 - np.cos(angle_radian))
+    else:
+        raise Exception("You must provide a radius or a height in inches")
+
+    half = angle_radian / 2.0
+    m_x = r * np.sin(half)
+    m_y = r * (1.0 - np.cos(half))
+    board_length = np.hypot(m_x, m_y)
+    # The mid point depth is the same as m_y, measured from the start of the curve.
+    curve_depth_major = m_y
+    return {
+        "angle": angle_radian * TO_DEGREES,
+        "height": h,
+        "length": r * np.sin(angle_radian),
+        "radius": r,
+        "arclength": r * angle_radian,
+        "mid_x": m_x,
+        "mid_y": m_y,
+        "board_length": board_length,
+        "curve_depth_major": curve_depth_major,
+        "curve_depth_minor": r * (1.0 - np.cos(angle_radian / 4.0)),
+        "join_angle": (pi - 2.0 * np.arctan(curve_depth_major / board_length)) * TO_DEGREES,
+    }
+
+
+@lru_cache(maxsize=1024)
+def kicker_geometry(angle_radian: float, height_inches: Optional[float] = None, radius_inches: Optional[float] = None):
+    """
+    angle_radian: takeoff angle
+    height_inches or radius_inches: the other dimension, radius wins if both are given
+
+    Returns (height, length, radius, theta) in inches and radians, where theta
+    is the angle of the lip measured from horizontal at the circle center.
+
+    Results are memoized per process, see kicker_geometry.cache_info().
+    """
+    if (angle_radian < 0 or angle_radian > pi / 2.0):
+        raise Exception(
+            f"Angle must be between 0 and pi / 4 radians. You gave ${angle_radian}")
+    theta = pi / 2.0 - angle_radian
+    # The same expressions as kicker_arrays, so rounded stats agree on ties.
+    if radius_inches:
+        r = radius_inches
+        h = r * (1.0 - cos(angle_radian))
+    elif height_inches:
+        h = height_inches
+        r = h / (1.0 - cos(angle_radian))
+    else:
+        raise Exception("You must provide a radius or a height in inches")
+    l = r * sin(angle_radian)
+    return (h, l, r, theta)
+
+
+def kicker_stats(angle_degree: float, height_inches: Optional[float] = None, radius_inches: Optional[float] = None,
+                 rung_width: float = 5.5):
+    """
+    The stats of a kicker as reported by Kicker.stats, computed from pure
+    geometry without building a Kicker or an image.
+
+    Returns a new dict each call so callers can add to it.
+    """
+    return dict(_kicker_stats(angle_degree, height_inches, radius_inches, rung_width))
+
+
+@lru_cache(maxsize=1024)
+def _kicker_stats(angle_degree: float, height_inches: Optional[float], radius_inches: Optional[float], rung_width: float):
+    angle_radian = degree_to_radian(angle_degree)
+    h, l, r, _ = kicker_geometry(angle_radian, height_inches, radius_inches)
+
+    out = {
+        "height_feet": format_float(h / 12.0, 2),
+        "height_inches": format_float(h, 2),
+        "length_feet": format_float(l / 12.0, 2),
+        "length_inches": format_float(l, 2),
+        "radius_feet": format_float(r / 12.0, 2),
+        "radius_inches": format_float(r, 2),
+        "takeoff_angle_degrees": format_float(angle_degree, 2),
+        "takeoff_angle_radians": format_float(angle_radian, 2),
+        "arclength_inches": format_float(angle_radian * r, 2),
+        "arclength_feet": format_float(angle_radian * r / 12.0, 2),
+    }
+    out.update(arc_rungs(r, angle_radian, rung_width).to_dict())
+    return out
+
+
+def kicker_stats_batch(angle_degree: Sequence[float], height_inches: Sequence[float], rung_width: float = 5.5) -> List[dict]:
+    """
+    kicker_stats for many (angle, height) designs at once.
+
+    Geometry and rung counts for the whole set are computed in one vectorized
+    pass (see kicker_arrays), only the final rounding is done per design so
+    the results match kicker_stats exactly.
+    """
+    angle_degree = np.asarray(angle_degree, dtype=np.float64)
+    geometry = kicker_arrays(angle_degree, height_inches=height_inches)
+    angle_radian = angle_degree * TO_RADIANS
+    h = geometry["height"]
+    l = geometry["length"]
+    r = geometry["radius"]
+    arclength = geometry["arclength"]
+    rung_count = arc_rung_count(r, angle_radian, rung_width)
+
+    columns = {
+        "height_feet": h / 12.0,
+        "height_inches": h,
+        "length_feet": l / 12.0,
+        "length_inches": l,
+        "radius_feet": r / 12.0,
+        "radius_inches": r,
+        "takeoff_angle_degrees": angle_degree,
+        "takeoff_angle_radians": angle_radian,
+        "arclength_inches": arclength,
+        "arclength_feet": arclength / 12.0,
+    }
+    columns = {name: values.tolist() for name, values in columns.items()}
+    rung_count = rung_count.tolist()
+
+    out = []
+    for i in range(len(angle_degree)):
+        stats = {name: format_float(values[i], 2) for name, values in columns.items()}
+        stats.update({
+            "rung_count": rung_count[i],
+            "rung_width_inches": rung_width,
+            "rung_gap_inches": DEFAULT_GAP,
+        })
+        out.append(stats)
+    return out
+
+
 if __name__ == '__main__':
     res = kicker_from_angle_and_radius(55.0, 16.0)
     print(json.dumps(res, indent=2))
@@ -0,0 +1,97 @@
+"""
+Pillow backend, draws a DisplayList onto an image.
+
+Besides RGB the canvas can be a palette (P), greyscale (L) or 1-bit image,
+one byte per pixel instead of three. Colours are mapped to each mode's ink:
+P uses the fixed palette from display_list, L the luminance and 1-bit draws
+everything but the background in black.
+"""
+import os
+from functools import lru_cache
+
+from typing import Optional, Tuple
+
+from display_list import COLORS, PALETTE, DisplayList, Line, Segments, Text, palette_index, point_pairs, rgb
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Yagora.ttf")
+
+
+@lru_cache(maxsize=32)
+def load_font(size: int):
+    """
+    Loads the label font once per size per process, so warm invocations
+    skip reading and parsing the font file. See load_font.cache_info().
+    """
+    from PIL import ImageFont
+    return ImageFont.truetype(FONT_PATH, size)
+
+
+# Canvas modes draw_display_list supports
+CANVAS_MODES = ("RGB", "P", "L", "1")
+# Bytes Pillow stores per pixel in each mode, 1-bit images use a whole byte
+BYTES_PER_PIXEL = {"RGB": 3, "P": 1, "L": 1, "1": 1}
+
+
+def ink(fill, mode: str):
+    """
+    fill (a colour name or RGB tuple) as the value to draw with in mode.
+    """
+    if mode == "P":
+        return palette_index(fill)
+    if mode == "L":
+        r, g, b = rgb(fill)
+        return (r * 299 + g * 587 + b * 114) // 1000
+    if mode == "1":
+        return 255 if rgb(fill) == COLORS["white"] else 0
+    return fill
+
+
+def blank_image(size: Tuple[int, int], background, mode: str = 'RGB'):
+    from PIL import Image
+
+    if mode not in CANVAS_MODES:
+        raise Exception(f"mode must be one of {', '.join(CANVAS_MODES)}. You gave {mode}")
+    image = Image.new(mode, size, ink(background, mode))
+    if mode == "P":
+        image.putpalette([channel for color in PALETTE for channel in color])
+    return image
+
+
+def new_image(display_list: DisplayList, mode: str = 'RGB'):
+    return blank_image(display_list.size, display_list.background, mode)
+
+
+def _transform(xy, origin: Tuple[float, float], scale: float):
+    return [((x - origin[0]) * scale, (y - origin[1]) * scale) for x, y in point_pairs(xy)]
+
+
+def draw_display_list(display_list: DisplayList, image, start: int = 0,
+                      origin: Tuple[float, float] = (0, 0), scale: float = 1.0, end: Optional[int] = None):
+    """
+    Draws the items from start up to end (all by default), in order, onto
+    image. origin (pixels of the display list) lands on the top left of image
+    and everything is scaled by scale, so a region can be drawn at another
+    resolution, e.g. one printed tile.
+    """
+    from PIL import ImageDraw
+
+    draw = ImageDraw.Draw(image)
+    mode = image.mode
+    moved = origin != (0, 0) or scale != 1.0
+    for item in display_list.items[start:end]:
+        if isinstance(item, Line):
+            xy = _transform(item.xy, origin, scale) if moved else item.xy
+            draw.line(xy, fill=ink(item.fill, mode), width=max(1, int(item.width * scale)))
+        elif isinstance(item, Segments):
+            # Pillow has no call for disjoint lines, one call each straight from the array.
+            segments = item.segments
+            if moved:
+                segments = (segments - origin) * scale
+            width = max(1, int(item.width * scale))
+            fill = ink(item.fill, mode)
+            for x0, y0, x1, y1 in segments.reshape(-1, 4).tolist():
+                draw.line([(x0, y0), (x1, y1)], fill=fill, width=width)
+        elif isinstance(item, Text):
+            xy = _transform([item.xy], origin, scale)[0] if moved else item.xy
+            draw.text(xy, item.text, ink(item.fill, mode), font=load_font(max(1, int(item.font_size * scale))))
+    return image
@@ -0,0 +1,67 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from aws import BUCKET_NAME, get_client
+
+
+class RenderCache():
+    """
+    Content addressed cache of rendered plans.
+
+    Entries are the stats (including url and id) of a render, keyed by a hash of
+    the normalized config. Lookups check an in-memory LRU first, which survives
+    warm Lambda invocations, then an index object in S3 at `{prefix}/{key}.json`.
+    Keys include ramp_base.RENDER_VERSION and the rendered objects are named
+    after the key (see BaseConfig.keyed_filename), so an entry never points at
+    a plan drawn by older code or for another config.
+    """
+
+    def __init__(self, max_size: int = 256, bucket: str = BUCKET_NAME, prefix: str = "cache"):
+        self.max_size = max_size
+        self.bucket = bucket
+        self.prefix = prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def s3(self):
+        return get_client('s3')
+
+    def _index_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        from botocore.exceptions import ClientError
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self._index_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+
+        stats = json.loads(response["Body"].read())
+        self._remember(key, stats)
+        return stats
+
+    def put(self, key: str, stats: dict):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._index_key(key),
+            Body=json.dumps(stats).encode("utf-8"),
+            ContentType="application/json"
+        )
+        self._remember(key, stats)
+
+    def _remember(self, key: str, stats: dict):
+        with self._lock:
+            self._entries[key] = stats
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+from math import pi
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from curve import flatten, sine_curve
+from encoders import DEFAULT_FORMAT
+from metrics import Metrics, layer
+from ramp_base import (BACKGROUND_COLOR, CURVE_COLOR, CURVE_LINE_INCHES,
+                       PADDING_INCHES, RENDER_VERSION, TO_RADIANS,
+                       BaseConfig, RampBase)
+from profiles import SineProfile
+from roller_math import (FRAME_BEAM_ANGLE_DEGREES, FRAME_BEAM_LENGTH_INCHES,
+                         FRAME_BEAM_WIDTH_INCHES, FRAME_RISE_INCHES, roller_arrays,
+                         roller_rungs, roller_stats)
+from rungs import RungLayout
+
+CANVAS_HEIGHT_INCHES = 4 * 12.0
+
+
+class RollerConfig(BaseConfig):
+    def __init__(self, length_in_inches, height_inches, output_dir=None, filename=None, pixels_per_inch=None, mode=None,
+                 show_rungs=True, show_frame=True, add_text=True, rung_width=5.5, debug=False,
+                 output_format: str = DEFAULT_FORMAT, max_pixels: Optional[int] = None,
+                 max_bytes: Optional[int] = None, target_width: Optional[int] = None):
+        self.L = length_in_inches
+        self.H = height_inches
+        self.LENGTH_IN_FEET = self.L / 12.0
+        output_dir = output_dir if output_dir else "output"
+        self.show_rungs = show_rungs
+
+        super().__init__(filename, output_dir, pixels_per_inch, mode=mode, show_frame=show_frame, add_text=add_text,
+                         rung_width=rung_width, debug=debug, output_format=output_format,
+                         max_pixels=max_pixels, max_bytes=max_bytes, target_width=target_width)
+        self.fit_resolution(self.L + 2 * PADDING_INCHES, CANVAS_HEIGHT_INCHES + 2 * PADDING_INCHES)
+        self.filename = filename if filename else self.keyed_filename(
+            "roller_{0}ft_by_{1}in".format(self.LENGTH_IN_FEET, self.H))
+
+    def cache_key(self) -> str:
+        """
+        Hash of everything that changes the rendered plan, see KickerConfig.cache_key.
+        """
+        normalized = {
+            "render_version": RENDER_VERSION,
+            "ramp": "roller",
+            "length_inches": round(float(self.L), 6),
+            "height_inches": round(float(self.H), 6),
+            "pixels_per_inch": self.pixels_per_inch,
+            "mode": self.mode,
+            "show_rungs": self.show_rungs,
+            "show_frame": self.show_frame,
+            "add_text": self.add_text,
+            "rung_width": round(float(self.rung_width), 6),
+            "output_format": self.output_format,
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Roller(RampBase):
+    def __init__(self, config: RollerConfig, image=None, metrics: Optional[Metrics] = None):
+        super().__init__(config, metrics)
+
+        with self.metrics.timer("geometry"):
+            self.stats = roller_stats(config.L, config.H, config.rung_width)
+            self.profile = SineProfile(config.L, config.H)
+            self.rungs = self.compute_rungs() if config.show_rungs else None
+
+        self.X = int(config.LENGTH_IN_FEET * 12 * config.pixels_per_inch)  # Total number of pixels of the feature in the horizontal
+        self.Y = int(CANVAS_HEIGHT_INCHES * config.pixels_per_inch)         # Total number of pixels in the vertical
+        self.A = self.inches(config.H / 2.0)
+        self.w = 2 * pi / self.X
+        self.H = self.A
+        self.Y_OFFSET = self.inches(1.5)
+        self.phase = pi / 2
+        self.out_path = os.path.join(config.output_dir, config.filename)
+
+        self.size = (self.padding["left"] + self.X + self.padding["right"], self.padding["bottom"] + self.Y + self.padding["top"])
+        self.mode = config.mode
+        self.color = BACKGROUND_COLOR
+        self.fill_width = self.line_width(CURVE_LINE_INCHES)
+
+        # Drawn onto when given, otherwise rasterize starts from new_canvas.
+        # Vector formats never rasterize, so they get no canvas.
+        self.image = image
+
+    def draw_image(self):
+        self.display_list = self.new_display_list()
+        self.render_grid()
+
+        self.display_list.start_layer("curve")
+        with self.metrics.timer("record"):
+            self.curve_points, self.curve_x, self.curve_y = self.compute_curve()
+            self.display_list.line(self.curve_points, fill=CURVE_COLOR, width=self.fill_width)
+        rung_count = 0
+        if self.config.show_rungs:
+            rung_count = self.add_rungs()
+
+        if self.config.show_frame:
+            self.render_frame()
+
+        if self.config.add_text:
+            rows = [
+                "Length: {0} feet".format(self.config.L / 12.0),
+                "Max Height: {0} inches".format(self.config.H),
+                "Max Slope: {0:.2f}".format(self.max_slope())
+            ]
+            if self.config.show_rungs:
+                rows.extend([
+                    "Number of Rungs: {0}".format(rung_count),
+                    "Rung Width: {0}".format(self.config.rung_width)
+                ])
+
+            self.add_text(rows)
+
+        # Raster formats get self.image right away, vector ones never need it.
+        if not self.encoder.vector:
+            self.rasterize()
+
+    def max_slope(self) -> float:
+        return float(roller_arrays(self.config.L, self.config.H)["max_slope"])
+
+    def save(self, id: Optional[str] = None) -> str:
+        return self._create("Roller", self.stats, id)
+
+    def delete(self, id: str):
+        self._delete("Roller", id)
+
+    def compute_curve(self) -> Tuple[List[float], np.ndarray, np.ndarray]:
+        x, y = sine_curve(self.A, self.w, self.phase, self.X, x_offset=self.padding["left"],
+                          y_offset=self.padding["top"] + (self.Y - self.H) - self.Y_OFFSET)
+        return flatten(x, y), x, y
+
+    def compute_rungs(self) -> RungLayout:
+        return roller_rungs(self.config.L, self.config.H, self.config.rung_width)
+
+    def to_pixels(self, x_inches, y_inches):
+        x = self.padding["left"] + self.inches(x_inches)
+        y = self.padding["top"] + self.Y - self.Y_OFFSET - self.inches(y_inches)
+        return x, y
+
+    @layer("frame")
+    def render_frame(self):
+        mid = self.get_midpoint()
+        anchor = (mid["x"], mid["y"] - self.inches(FRAME_RISE_INCHES))
+        angle = FRAME_BEAM_ANGLE_DEGREES * TO_RADIANS
+        length = self.inches(FRAME_BEAM_LENGTH_INCHES)
+        width = self.inches(FRAME_BEAM_WIDTH_INCHES)
+
+        self.render_beam(anchor, length, width, angle)
+        self.render_beam(anchor, -length, width, -angle)
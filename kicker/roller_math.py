@@ -0,0 +1,113 @@
+"""
+Roller geometry in closed form, the roller counterpart of ramp_math.
+
+A roller of length L and height H (inches) follows one period of a raised
+cosine, in its own frame (origin at the start, y up):
+
+    y(x) = H / 2 * (1 - cos(2 pi x / L))
+
+so the steepest point is a quarter of the way in with slope pi H / L and the
+tightest bend is at the crest (and the ends) with radius L^2 / (2 pi^2 H).
+The arc length is an elliptic integral, it and the rung layout come from
+profiles.SineProfile so the sine is only described in one place.
+"""
+from functools import lru_cache
+from math import pi
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from profiles import SineProfile, sine_arclength
+from rungs import RungLayout, polyline_rungs
+from utils import TO_DEGREES, TO_RADIANS, format_float
+
+# The frame Roller.render_frame draws: two beams hanging from just above the
+# crest, one either side.
+FRAME_BEAM_LENGTH_INCHES = 8 * 12.0
+FRAME_BEAM_WIDTH_INCHES = 11.5
+FRAME_BEAM_ANGLE_DEGREES = 16.0
+FRAME_RISE_INCHES = 3.0
+# Significant digits of the reported stats, lengths reach hundreds of inches
+STATS_DIGITS = 4
+# Max distance between the sampled profile and the true one for rung layout
+RUNG_TOLERANCE = 0.01
+
+
+def roller_arrays(length_inches, height_inches) -> Dict[str, np.ndarray]:
+    """
+    Geometry of many rollers at once.
+
+    Inputs are scalars or arrays and broadcast against each other. Returns
+    unrounded float64 columns, lengths in inches and angles in degrees:
+    length, height, max_slope, arclength, min_radius, frame_span and frame_top.
+    """
+    length, height = np.broadcast_arrays(np.asarray(length_inches, dtype=np.float64),
+                                         np.asarray(height_inches, dtype=np.float64))
+    if np.any(length <= 0) or np.any(height <= 0):
+        raise Exception("Length and height must be greater than 0")
+
+    slope = pi * height / length
+    beam_angle = FRAME_BEAM_ANGLE_DEGREES * TO_RADIANS
+    return {
+        "length": length,
+        "height": height,
+        "max_slope": np.arctan(slope) * TO_DEGREES,
+        "arclength": sine_arclength(length, height),
+        "min_radius": length ** 2 / (2.0 * pi ** 2 * height),
+        "frame_span": np.full(length.shape, 2.0 * FRAME_BEAM_LENGTH_INCHES * np.cos(beam_angle)),
+        "frame_top": height + FRAME_RISE_INCHES,
+    }
+
+
+def roller_rungs(length_inches: float, height_inches: float, rung_width: float) -> RungLayout:
+    """
+    Rungs laid along the profile, in inches.
+    """
+    x, y = SineProfile(length_inches, height_inches).polyline(RUNG_TOLERANCE)
+    return polyline_rungs(x, y, rung_width)
+
+
+def roller_stats(length_inches: float, height_inches: float, rung_width: float = 5.5) -> dict:
+    """
+    The stats of a roller as reported by Roller.stats, without building a
+    Roller or an image. Returns a new dict each call so callers can add to it.
+    """
+    return dict(_roller_stats(length_inches, height_inches, rung_width))
+
+
+@lru_cache(maxsize=1024)
+def _roller_stats(length_inches: float, height_inches: float, rung_width: float):
+    return roller_stats_batch([length_inches], [height_inches], rung_width)[0]
+
+
+def roller_stats_batch(length_inches: Sequence[float], height_inches: Sequence[float],
+                       rung_width: float = 5.5) -> List[dict]:
+    """
+    roller_stats for many (length, height) designs. The geometry is one
+    vectorized pass, rungs are laid out per design since their count depends
+    on where each one lands along the curve.
+    """
+    geometry = roller_arrays(length_inches, height_inches)
+    columns = {
+        "length_feet": geometry["length"] / 12.0,
+        "length_inches": geometry["length"],
+        "height_feet": geometry["height"] / 12.0,
+        "height_inches": geometry["height"],
+        "max_slope_degrees": geometry["max_slope"],
+        "arclength_inches": geometry["arclength"],
+        "arclength_feet": geometry["arclength"] / 12.0,
+        "min_radius_inches": geometry["min_radius"],
+        "frame_span_inches": geometry["frame_span"],
+        "frame_top_inches": geometry["frame_top"],
+    }
+    out = []
+    for i in range(len(geometry["length"])):
+        stats = {name: format_float(float(column[i]), STATS_DIGITS) for name, column in columns.items()}
+        stats.update({
+            "frame_beam_length_inches": FRAME_BEAM_LENGTH_INCHES,
+            "frame_beam_width_inches": FRAME_BEAM_WIDTH_INCHES,
+            "frame_beam_angle_degrees": FRAME_BEAM_ANGLE_DEGREES,
+        })
+        stats.update(roller_rungs(float(geometry["length"][i]), float(geometry["height"][i]), rung_width).to_dict())
+        out.append(stats)
+    return out
@@ -0,0 +1,132 @@
+"""
+Rung layout for ramp profiles.
+
+Rungs are straight boards laid edge to edge along the curve: each rung spans a
+chord of `rung_width` and consecutive rungs are separated by a chord of
+`gap_width`. Layouts are computed in inches in the ramp's own frame (origin at
+the start of the curve, y up) so they do not depend on render resolution.
+"""
+from math import asin, hypot, sqrt
+from typing import Sequence
+
+import numpy as np
+
+# Gap left between rungs in inches
+DEFAULT_GAP = 1.5
+
+
+class RungLayout():
+    """
+    Cut list for the rungs of a ramp.
+
+    Each rung i runs from (start_x[i], start_y[i]) to (end_x[i], end_y[i]) in inches.
+    """
+
+    def __init__(self, start_x: np.ndarray, start_y: np.ndarray, end_x: np.ndarray, end_y: np.ndarray,
+                 rung_width: float, gap_width: float = DEFAULT_GAP):
+        self.start_x = start_x
+        self.start_y = start_y
+        self.end_x = end_x
+        self.end_y = end_y
+        self.rung_width = rung_width
+        self.gap_width = gap_width
+        self.count = len(start_x)
+
+    @property
+    def gaps(self) -> np.ndarray:
+        """
+        Straight line distance between the end of each rung and the start of the next.
+        """
+        return np.hypot(self.start_x[1:] - self.end_x[:-1], self.start_y[1:] - self.end_y[:-1])
+
+    def to_dict(self):
+        return {
+            "rung_count": self.count,
+            "rung_width_inches": self.rung_width,
+            "rung_gap_inches": self.gap_width,
+        }
+
+
+def arc_rung_count(radius, sweep, rung_width: float, gap_width: float = DEFAULT_GAP):
+    """
+    Number of rungs that fit on a circular arc of `radius` inches sweeping
+    `sweep` radians. Works on scalars or arrays of radius and sweep.
+
+    A chord of length c subtends 2 * asin(c / 2r), so every rung and gap covers
+    a fixed angle and a rung fits if it ends on or before the end of the arc.
+    """
+    radius = np.asarray(radius, dtype=np.float64)
+    fits = (rung_width <= 2 * radius) & (gap_width <= 2 * radius)
+    safe_radius = np.where(fits, radius, max(rung_width, gap_width))
+    rung_angle = 2.0 * np.arcsin(rung_width / (2.0 * safe_radius))
+    gap_angle = 2.0 * np.arcsin(gap_width / (2.0 * safe_radius))
+    count = np.floor((sweep + gap_angle) / (rung_angle + gap_angle) + 1e-9).astype(np.int64)
+    return np.where(fits, count, 0)
+
+
+def arc_rungs(radius: float, sweep: float, rung_width: float, gap_width: float = DEFAULT_GAP) -> RungLayout:
+    """
+    Lays out rungs on a circular arc of `radius` inches sweeping `sweep` radians
+    up from the bottom of the circle, in O(rungs). See arc_rung_count.
+    """
+    count = int(arc_rung_count(radius, sweep, rung_width, gap_width))
+    if count == 0:
+        empty = np.zeros(0)
+        return RungLayout(empty, empty, empty, empty, rung_width, gap_width)
+
+    rung_angle = 2.0 * asin(rung_width / (2.0 * radius))
+    gap_angle = 2.0 * asin(gap_width / (2.0 * radius))
+    start = np.arange(count) * (rung_angle + gap_angle)
+    end = start + rung_angle
+    return RungLayout(
+        radius * np.sin(start), radius * (1.0 - np.cos(start)),
+        radius * np.sin(end), radius * (1.0 - np.cos(end)),
+        rung_width, gap_width
+    )
+
+
+def polyline_rungs(x: Sequence[float], y: Sequence[float], rung_width: float, gap_width: float = DEFAULT_GAP) -> RungLayout:
+    """
+    Lays out rungs along any curve given as a polyline in inches, e.g. the
+    adaptively sampled sine of a roller.
+
+    Walks the segments once, so the cost is O(segments + rungs). Rung ends are
+    interpolated along a segment rather than snapped to sample points.
+    """
+    starts = []
+    ends = []
+    p1 = (x[0], y[0])
+    a = p1
+    in_gap = False
+    for i in range(1, len(x)):
+        b = (x[i], y[i])
+        target = gap_width if in_gap else rung_width
+        while hypot(b[0] - p1[0], b[1] - p1[1]) > target:
+            p2 = _point_at_distance(p1, a, b, target)
+            if not in_gap:
+                starts.append(p1)
+                ends.append(p2)
+            in_gap = not in_gap
+            p1 = a = p2
+            target = gap_width if in_gap else rung_width
+        a = b
+
+    starts = np.array(starts).reshape(-1, 2)
+    ends = np.array(ends).reshape(-1, 2)
+    return RungLayout(starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1], rung_width, gap_width)
+
+
+def _point_at_distance(p1, a, b, d):
+    """
+    Returns the point on segment a -> b that is distance d from p1.
+    Assumes a is within d of p1 and b is not.
+    """
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    fx = a[0] - p1[0]
+    fy = a[1] - p1[1]
+    qa = dx * dx + dy * dy
+    qb = 2 * (fx * dx + fy * dy)
+    qc = fx * fx + fy * fy - d * d
+    t = (-qb + sqrt(max(qb * qb - 4 * qa * qc, 0.0))) / (2 * qa)
+    return (a[0] + t * dx, a[1] + t * dy)
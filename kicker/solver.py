@@ -0,0 +1,148 @@
+"""
+Inverse kicker design: the full geometry from any two of angle, height,
+radius, length, arclength and board_length.
+
+Every length of a kicker is its radius times a function of the takeoff angle a:
+
+    height       r * (1 - cos a)
+    length       r * sin a
+    arclength    r * a
+    board_length r * 2 sin(a / 4)     chord from the start to the mid point
+
+So the angle and radius give everything (ramp_math.kicker_arrays). With the
+angle or the radius known the other follows in closed form, as does height
+with length (tan(a / 2) = height / length). Any other pair of lengths fixes
+their ratio, a monotonic function of a on (0, 90] degrees, which is solved by
+vectorized bisection.
+"""
+from math import pi
+from typing import Dict, List
+
+import numpy as np
+
+from ramp_math import kicker_arrays
+from utils import TO_DEGREES, TO_RADIANS
+
+QUANTITIES = ("angle", "height", "radius", "length", "arclength", "board_length")
+# Per unit radius, as a function of the takeoff angle in radians
+UNIT_LENGTHS = {
+    "height": lambda a: 1.0 - np.cos(a),
+    "length": np.sin,
+    "arclength": lambda a: a,
+    "board_length": lambda a: 2.0 * np.sin(a / 4.0),
+}
+MIN_ANGLE = 1e-6  # radians
+MAX_ANGLE = pi / 2.0
+BISECTION_STEPS = 60
+
+
+def _angle_from_ratio(first: str, second: str, ratio: np.ndarray) -> np.ndarray:
+    """
+    The angle where UNIT_LENGTHS[first] / UNIT_LENGTHS[second] == ratio, NaN
+    where no angle in range gives that ratio.
+    """
+    f = lambda a: UNIT_LENGTHS[first](a) / UNIT_LENGTHS[second](a)  # noqa: E731
+    lo = np.full(ratio.shape, MIN_ANGLE)
+    hi = np.full(ratio.shape, MAX_ANGLE)
+    f_lo = f(lo)
+    f_hi = f(hi)
+    increasing = f_hi > f_lo
+    feasible = (ratio >= np.minimum(f_lo, f_hi)) & (ratio <= np.maximum(f_lo, f_hi))
+    for _ in range(BISECTION_STEPS):
+        mid = (lo + hi) / 2.0
+        below = (f(mid) < ratio) == increasing
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    return np.where(feasible, (lo + hi) / 2.0, np.nan)
+
+
+def _angle_and_radius(known: Dict[str, np.ndarray]):
+    """
+    Returns (angle in radians, radius in inches), NaN where infeasible.
+    """
+    names = set(known)
+    if "angle" in names:
+        a = known["angle"] * TO_RADIANS
+        (other,) = names - {"angle"}
+        if other == "radius":
+            return a, known["radius"]
+        return a, known[other] / UNIT_LENGTHS[other](a)
+
+    if "radius" in names:
+        r = known["radius"]
+        (other,) = names - {"radius"}
+        with np.errstate(invalid="ignore"):
+            if other == "height":
+                a = np.arccos(1.0 - known["height"] / r)
+            elif other == "length":
+                a = np.arcsin(known["length"] / r)
+            elif other == "arclength":
+                a = known["arclength"] / r
+            else:
+                a = 4.0 * np.arcsin(known["board_length"] / (2.0 * r))
+        return a, r
+
+    if names == {"height", "length"}:
+        a = 2.0 * np.arctan(known["height"] / known["length"])
+        return a, known["length"] / np.sin(a)
+
+    first, second = sorted(names)
+    a = _angle_from_ratio(first, second, known[first] / known[second])
+    return a, known[first] / UNIT_LENGTHS[first](a)
+
+
+def solve_kickers(**known) -> Dict[str, np.ndarray]:
+    """
+    solve_kickers(arclength=[96, 120], board_length=48)
+
+    Exactly two of angle (degrees), height, radius, length, arclength and
+    board_length (inches), as scalars or arrays that broadcast together.
+    Returns the columns of ramp_math.kicker_arrays. Designs with no kicker of
+    0-90 degrees that meets both values are NaN in every column.
+    """
+    unknown = set(known) - set(QUANTITIES)
+    if unknown:
+        raise Exception(f"Can not solve from {', '.join(sorted(unknown))}. Use {', '.join(QUANTITIES)}")
+    if len(known) != 2:
+        raise Exception(f"Give exactly two of {', '.join(QUANTITIES)}. You gave {len(known)}")
+
+    names = list(known)
+    values = np.broadcast_arrays(*[np.asarray(known[name], dtype=np.float64) for name in names])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a, r = _angle_and_radius(dict(zip(names, values)))
+        a, r = np.broadcast_arrays(a, r)
+        ok = np.isfinite(a) & np.isfinite(r) & (a > 0) & (a <= MAX_ANGLE + 1e-12) & (r > 0)
+        ok &= np.all([v > 0 for v in values], axis=0)
+
+    columns = kicker_arrays(np.where(ok, np.minimum(a, MAX_ANGLE), MAX_ANGLE) * TO_DEGREES,
+                            radius_inches=np.where(ok, r, 1.0))
+    return {name: np.where(ok, column, np.nan) for name, column in columns.items()}
+
+
+def solve_kicker(**known) -> Dict[str, float]:
+    """
+    solve_kickers for a single design, raises if there is no such kicker.
+    """
+    columns = solve_kickers(**known)
+    if np.isnan(columns["radius"]).any():
+        given = ", ".join(f"{name}={value}" for name, value in known.items())
+        raise Exception(f"No kicker between 0 and 90 degrees has {given}")
+    return {name: float(column) for name, column in columns.items()}
+
+
+def solve_designs(designs: List[dict]) -> List[Dict[str, float]]:
+    """
+    Solves a list of constraint dicts that may each give a different pair,
+    one vectorized call per pair. Infeasible designs come back as None.
+    """
+    groups = {}
+    for index, design in enumerate(designs):
+        groups.setdefault(tuple(sorted(design)), []).append(index)
+
+    out: List = [None] * len(designs)
+    for names, indexes in groups.items():
+        columns = solve_kickers(**{name: [designs[i][name] for i in indexes] for name in names})
+        for k, index in enumerate(indexes):
+            if not np.isnan(columns["radius"][k]):
+                out[index] = {name: float(column[k]) for name, column in columns.items()}
+    return out
@@ -0,0 +1,170 @@
+"""
+Streams encoded images to storage while they are being encoded.
+
+StreamingUpload is a write only file object, Pillow encodes straight into it.
+Every `part_size` bytes are handed to a background thread that uploads them as
+one part of a multipart upload, so compression and network I/O overlap and
+memory is bounded by a few parts no matter how large the image is.
+
+Sinks decide where the parts go: S3Sink for S3, FileSink for a local file
+(for running without AWS).
+"""
+import os
+import queue
+import threading
+from typing import Optional
+
+# S3 requires every part but the last to be at least 5 MB
+PART_SIZE = 5 * 1024 * 1024
+
+
+class S3Sink():
+    def __init__(self, client, bucket: str, key: str, extra_args: Optional[dict] = None):
+        """
+        extra_args: passed to put_object / create_multipart_upload, e.g. {"ACL": "public-read"}
+        """
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.extra_args = extra_args if extra_args else {}
+        self.upload_id = None
+        self.parts = []
+
+    def put(self, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.key, Body=data, **self.extra_args)
+
+    def start(self):
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key, **self.extra_args)
+        self.upload_id = response["UploadId"]
+
+    def write_part(self, number: int, data: bytes):
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=data)
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def complete(self):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts})
+
+    def abort(self):
+        if self.upload_id:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+class FileSink():
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def put(self, data: bytes):
+        self.start()
+        self.file.write(data)
+        self.complete()
+
+    def start(self):
+        out_dir = os.path.dirname(self.path)
+        if out_dir and not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        self.file = open(self.path, "wb")
+
+    def write_part(self, number: int, data: bytes):
+        self.file.write(data)
+
+    def complete(self):
+        self.file.close()
+
+    def abort(self):
+        if self.file:
+            self.file.close()
+            os.remove(self.path)
+
+
+class StreamingUpload():
+    """
+    with StreamingUpload(sink) as stream:
+        image.save(stream, format="PNG")
+
+    Output smaller than one part is sent with a single sink.put.
+    """
+
+    def __init__(self, sink, part_size: int = PART_SIZE, max_pending: int = 2):
+        self.sink = sink
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.bytes_written = 0
+        self.part_count = 0
+        self.error = None
+        # Bounded so a slow network blocks the encoder instead of buffering the image.
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.uploader = None
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.bytes_written += len(data)
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._send(part)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _send(self, part: bytes):
+        if self.error:
+            raise self.error
+        if self.uploader is None:
+            self.sink.start()
+            self.uploader = threading.Thread(target=self._upload_parts, daemon=True)
+            self.uploader.start()
+        self.part_count += 1
+        self.pending.put((self.part_count, part))
+
+    def _upload_parts(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            if self.error:
+                continue
+            try:
+                self.sink.write_part(*item)
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        if self.uploader is None:
+            self.sink.put(bytes(self.buffer))
+            self.buffer = bytearray()
+            return
+
+        # Any failure from here on, including the uploader's, aborts the
+        # multipart upload so S3 does not keep its parts.
+        try:
+            if self.buffer:
+                self._send(bytes(self.buffer))
+                self.buffer = bytearray()
+            self._stop()
+            if self.error:
+                raise self.error
+            self.sink.complete()
+        except Exception:
+            if self.uploader.is_alive():
+                self._stop()
+            self.sink.abort()
+            raise
+
+    def _stop(self):
+        self.pending.put(None)
+        self.uploader.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.uploader is not None:
+            self._stop()
+            self.sink.abort()
+        return False
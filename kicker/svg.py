@@ -0,0 +1,53 @@
+"""
+SVG backend, writes a DisplayList as vectors without rasterizing anything.
+"""
+from xml.sax.saxutils import escape
+
+from display_list import DisplayList, Line, Segments, Text, point_pairs
+
+FONT_FAMILY = "Yagora, sans-serif"
+
+
+def svg_color(fill) -> str:
+    """
+    Pillow colours are names like 'red' or (r, g, b) tuples.
+    """
+    if isinstance(fill, (tuple, list)):
+        return "rgb({0},{1},{2})".format(*fill[:3])
+    return fill
+
+
+def _number(value: float) -> str:
+    return f"{float(value):.2f}".rstrip("0").rstrip(".")
+
+
+def render_svg(display_list: DisplayList) -> str:
+    width, height = display_list.size
+    rows = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+    ]
+    if display_list.background:
+        rows.append(f'<rect width="100%" height="100%" fill="{svg_color(display_list.background)}"/>')
+    for item in display_list.items:
+        if isinstance(item, Line):
+            points = " ".join(f"{_number(x)},{_number(y)}" for x, y in point_pairs(item.xy))
+            rows.append(f'<polyline points="{points}" fill="none" stroke="{svg_color(item.fill)}" '
+                        f'stroke-width="{_number(item.width)}"/>')
+        elif isinstance(item, Segments):
+            path = " ".join(f"M{_number(x0)},{_number(y0)} L{_number(x1)},{_number(y1)}"
+                            for x0, y0, x1, y1 in item.segments.reshape(-1, 4).tolist())
+            rows.append(f'<path d="{path}" fill="none" stroke="{svg_color(item.fill)}" '
+                        f'stroke-width="{_number(item.width)}"/>')
+        elif isinstance(item, Text):
+            # Pillow places the top left of the text at xy.
+            rows.append(f'<text x="{_number(item.xy[0])}" y="{_number(item.xy[1])}" fill="{svg_color(item.fill)}" '
+                        f'font-family="{FONT_FAMILY}" font-size="{item.font_size}" '
+                        f'dominant-baseline="text-before-edge">{escape(item.text)}</text>')
+    rows.append('</svg>')
+    return "\n".join(rows)
+
+
+def write_svg(display_list: DisplayList, fp):
+    fp.write(render_svg(display_list).encode("utf-8"))
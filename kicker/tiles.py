@@ -0,0 +1,241 @@
+"""
+Full scale (1:1) printable templates split across pages.
+
+A plan printed at full scale is several feet across, far too big for one
+canvas at print resolution. TiledRenderer cuts the ramp's display list into
+page sized tiles that overlap by a strip, draws registration marks in the
+middle of each strip so neighbouring pages can be lined up, and renders every
+tile on its own so memory is bounded by one page whatever the ramp size.
+
+A template only needs what gets traced, so it is not the preview at full
+scale: the preview's 2.5 in rung bars would cover the curve. template_strokes
+rebuilds the curve and frame from the ramp's layers as 1 pt lines and marks
+each rung with a tick across the curve at both ends. The grid and labels are
+left out, the pages cover the ramp plus TEMPLATE_MARGIN_INCHES rather than the
+whole padded canvas, and pages no stroke crosses are not printed. A 55 degree
+/ 6 ft kicker is 52 letter pages instead of 220.
+
+    ramp = Kicker(KickerConfig(55, height_inches=72, output_format="pdf"))
+    ramp.draw_image()
+    TiledRenderer(ramp, page="letter").write_pdf(fp)
+
+Use a vector output_format (svg, pdf) so the ramp never allocates its full
+canvas.
+"""
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from display_list import DisplayList, Line, Segments
+from pdf import PdfWriter
+from raster import blank_image, draw_display_list
+
+# (width, height) in inches, portrait
+PAGE_SIZES = {
+    "letter": (8.5, 11.0),
+    "legal": (8.5, 14.0),
+    "tabloid": (11.0, 17.0),
+    "a4": (8.27, 11.69),
+    "a3": (11.69, 16.54),
+}
+OVERLAP_INCHES = 0.5
+MARGIN_INCHES = 0.25
+# Blank border around the ramp's strokes covered by the pages
+TEMPLATE_MARGIN_INCHES = 1.0
+# Resolution of the PNG tiles
+TILE_DPI = 150
+# Width of everything traced, 1 pt
+PRINT_LINE_INCHES = 1 / 72.0
+# Length of the ticks across the curve where each rung starts and ends
+RUNG_TICK_INCHES = 1.0
+MARK_INCHES = 0.4
+MARK_LINE_INCHES = 0.02
+LABEL_INCHES = 0.2
+
+
+def template_strokes(display_list: DisplayList, pixels_per_inch: float) -> DisplayList:
+    """
+    What a template traces, from a ramp's display list in canvas pixels: the
+    curve and frame layers redrawn at PRINT_LINE_INCHES, and for the rungs
+    layer a tick across the curve at both ends of every rung, in the rung
+    colour. The grid and text are left out.
+    """
+    out = DisplayList(display_list.size, display_list.background)
+    width = PRINT_LINE_INCHES * pixels_per_inch
+    half_tick = RUNG_TICK_INCHES / 2.0 * pixels_per_inch
+    for name, start, end in display_list.layers():
+        for item in display_list.items[start:end]:
+            if name in ("curve", "frame") and isinstance(item, Line):
+                out.line(item.xy, fill=item.fill, width=width)
+            elif name == "rungs" and isinstance(item, Segments):
+                # A rung lies along its chord of the curve, the tick is normal to it.
+                ends = item.segments
+                along = ends[:, 1] - ends[:, 0]
+                normal = np.stack([-along[:, 1], along[:, 0]], axis=-1) / np.hypot(along[:, 0], along[:, 1])[:, None]
+                points = np.concatenate([ends[:, 0], ends[:, 1]])
+                normal = np.concatenate([normal, normal]) * half_tick
+                out.segments(*(points - normal).T, *(points + normal).T, fill=item.fill, width=width)
+    return out
+
+
+class Tile():
+    def __init__(self, row: int, col: int, origin: Tuple[float, float], size: Tuple[float, float]):
+        """
+        origin and size: the region of the canvas on this page, in pixels
+        """
+        self.row = row
+        self.col = col
+        self.origin = origin
+        self.size = size
+
+    @property
+    def name(self) -> str:
+        return f"r{self.row + 1}_c{self.col + 1}"
+
+
+class TiledRenderer():
+    def __init__(self, ramp, page: str = "letter", landscape: bool = False,
+                 overlap_inches: float = OVERLAP_INCHES, margin_inches: float = MARGIN_INCHES):
+        """
+        ramp: a Kicker or Roller after draw_image
+        page: one of PAGE_SIZES
+        """
+        if ramp.display_list is None:
+            raise Exception("Call draw_image before tiling")
+        if page not in PAGE_SIZES:
+            raise Exception(f"page must be one of {', '.join(PAGE_SIZES)}. You gave {page}")
+        self.pixels_per_inch = ramp.config.pixels_per_inch
+        self.display_list = template_strokes(ramp.display_list, self.pixels_per_inch)
+        if not len(self.display_list):
+            raise Exception("The ramp has nothing to trace")
+        width, height = PAGE_SIZES[page]
+        self.page_inches = (height, width) if landscape else (width, height)
+        self.overlap_inches = overlap_inches
+        self.margin_inches = margin_inches
+
+        self.printable_inches = (self.page_inches[0] - 2 * margin_inches, self.page_inches[1] - 2 * margin_inches)
+        if min(self.printable_inches) <= overlap_inches:
+            raise Exception("overlap must be smaller than the printable area of the page")
+
+        # The region the pages cover, in canvas pixels
+        margin = self._px(TEMPLATE_MARGIN_INCHES)
+        left, top, right, bottom = self.display_list.bounds()
+        self.origin = (left - margin, top - margin)
+        self.columns = self._count((right - left + 2 * margin) / self.pixels_per_inch, self.printable_inches[0])
+        self.rows = self._count((bottom - top + 2 * margin) / self.pixels_per_inch, self.printable_inches[1])
+        self._tiles = None
+        self._printed = set()
+
+    def _count(self, length_inches: float, printable_inches: float) -> int:
+        step = printable_inches - self.overlap_inches
+        return max(1, ceil((length_inches - self.overlap_inches) / step))
+
+    def _px(self, inches: float) -> float:
+        return inches * self.pixels_per_inch
+
+    def tiles(self) -> List[Tile]:
+        """
+        The pages with something to trace, row by row from the top left.
+        Tile (r, c) starts one step (printable width less the overlap) after
+        its neighbour.
+        """
+        if self._tiles is None:
+            step_x = self._px(self.printable_inches[0] - self.overlap_inches)
+            step_y = self._px(self.printable_inches[1] - self.overlap_inches)
+            size = (self._px(self.printable_inches[0]), self._px(self.printable_inches[1]))
+            grid = [Tile(row, col, (self.origin[0] + col * step_x, self.origin[1] + row * step_y), size)
+                    for row in range(self.rows) for col in range(self.columns)]
+            self._tiles = [tile for tile in grid if len(self.display_list.clipped(tile.origin, tile.size))]
+            self._printed = {(tile.row, tile.col) for tile in self._tiles}
+        return self._tiles
+
+    def overlay(self, tile: Tile) -> DisplayList:
+        """
+        Registration marks in the overlap strips shared with printed
+        neighbours, at the same canvas positions on both pages, and the page
+        label.
+        """
+        tiles = self.tiles()
+        printed = self._printed
+        marks = DisplayList(self.display_list.size, background=None)
+        x0, y0 = tile.origin
+        width, height = tile.size
+        half_overlap = self._px(self.overlap_inches / 2)
+        arm = self._px(MARK_INCHES / 2)
+        line_width = self._px(MARK_LINE_INCHES)
+
+        xs = []
+        if (tile.row, tile.col - 1) in printed:
+            xs.append(x0 + half_overlap)
+        if (tile.row, tile.col + 1) in printed:
+            xs.append(x0 + width - half_overlap)
+        ys = []
+        if (tile.row - 1, tile.col) in printed:
+            ys.append(y0 + half_overlap)
+        if (tile.row + 1, tile.col) in printed:
+            ys.append(y0 + height - half_overlap)
+
+        centers = [(x, y0 + height * f) for x in xs for f in (0.25, 0.75)]
+        centers += [(x0 + width * f, y) for y in ys for f in (0.25, 0.75)]
+        centers += [(x, y) for x in xs for y in ys]
+        for x, y in centers:
+            marks.line([(x - arm, y), (x + arm, y)], fill='black', width=line_width)
+            marks.line([(x, y - arm), (x, y + arm)], fill='black', width=line_width)
+
+        label = f"Page {tiles.index(tile) + 1} of {len(tiles)} " \
+                f"(row {tile.row + 1}, column {tile.col + 1})"
+        marks.text((x0 + half_overlap * 2, y0 + half_overlap * 2), label, 'black',
+                   font_size=self._px(LABEL_INCHES))
+        return marks
+
+    def write_pdf(self, fp):
+        """
+        One page per tile, vectors at full scale.
+        """
+        writer = PdfWriter()
+        for tile in self.tiles():
+            writer.add_page(self.display_list.clipped(tile.origin, tile.size), self.pixels_per_inch,
+                            origin=tile.origin, size=tile.size,
+                            margin_inches=self.margin_inches, overlays=[self.overlay(tile)])
+        writer.save(fp)
+
+    def render_tile(self, tile: Tile, dpi: int = TILE_DPI):
+        """
+        The page for tile as a palette image at dpi, margins included. Palette
+        mode draws text without anti-aliasing, which prints crisper, and encodes
+        several times faster than RGB.
+        """
+        scale = dpi / self.pixels_per_inch
+        background = self.display_list.background
+        printable = blank_image((round(tile.size[0] * scale), round(tile.size[1] * scale)), background, 'P')
+        draw_display_list(self.display_list.clipped(tile.origin, tile.size), printable,
+                          origin=tile.origin, scale=scale)
+        draw_display_list(self.overlay(tile), printable, origin=tile.origin, scale=scale)
+
+        page = blank_image((round(self.page_inches[0] * dpi), round(self.page_inches[1] * dpi)), background, 'P')
+        margin = round(self.margin_inches * dpi)
+        page.paste(printable, (margin, margin))
+        return page
+
+    def _encode_tile(self, tile: Tile, dpi: int) -> bytes:
+        out = io.BytesIO()
+        self.render_tile(tile, dpi).save(out, format="PNG", dpi=(dpi, dpi))
+        return out.getvalue()
+
+    def write_zip(self, fp, dpi: int = TILE_DPI, workers: Optional[int] = None):
+        """
+        One PNG per tile. Tiles are rendered in a thread pool, workers=1 renders
+        them one at a time. Memory is bounded by the tiles in flight and the
+        encoded PNGs, never the whole plan at dpi.
+        """
+        tiles = self.tiles()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pngs = pool.map(lambda tile: self._encode_tile(tile, dpi), tiles)
+            # PNGs are already compressed
+            with zipfile.ZipFile(fp, "w", compression=zipfile.ZIP_STORED) as archive:
+                for tile, png in zip(tiles, pngs):
+                    archive.writestr(f"{tile.name}.png", png)
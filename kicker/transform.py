@@ -0,0 +1,59 @@
+"""
+2D affine transforms applied to whole arrays of points at once.
+
+A MatrixStack holds the current transform as a 3x3 matrix. translate, rotate
+and scale compose onto it, so the last one given is applied to the points
+first, like a canvas API:
+
+    stack = MatrixStack()
+    stack.translate(*anchor)
+    stack.rotate(angle_radian)
+    corners = stack.apply([(0, 0), (length, 0), (length, width), (0, width)])
+
+push() saves the transform and restores it when the block ends.
+"""
+from contextlib import contextmanager
+from math import cos, sin
+
+import numpy as np
+
+
+class MatrixStack():
+    def __init__(self):
+        self.stack = [np.eye(3)]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.stack[-1]
+
+    @contextmanager
+    def push(self):
+        self.stack.append(self.matrix.copy())
+        try:
+            yield self
+        finally:
+            self.stack.pop()
+
+    def _compose(self, matrix: np.ndarray) -> "MatrixStack":
+        self.stack[-1] = self.matrix @ matrix
+        return self
+
+    def translate(self, dx: float, dy: float) -> "MatrixStack":
+        return self._compose(np.array([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]]))
+
+    def rotate(self, angle_radian: float) -> "MatrixStack":
+        c = cos(angle_radian)
+        s = sin(angle_radian)
+        return self._compose(np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]]))
+
+    def scale(self, sx: float, sy=None) -> "MatrixStack":
+        sy = sx if sy is None else sy
+        return self._compose(np.array([[sx, 0.0, 0.0], [0.0, sy, 0.0], [0.0, 0.0, 1.0]]))
+
+    def apply(self, points) -> np.ndarray:
+        """
+        points: (..., 2) array like, returns the transformed (..., 2) array.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        m = self.matrix
+        return points @ m[:2, :2].T + m[:2, 2]
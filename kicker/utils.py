@@ -1,15 +1,16 @@
 
+import os
 from math import pi, sqrt
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 TO_DEGREES = 180.0 / pi
 TO_RADIANS = pi / 180.0
 
 
-def format_float(f: float):
+def format_float(f: float, digits: int = 5):
     if isinstance(f, float):
-        return float(f"{f:.5}")
+        return float(f"{f:.{digits}}")
     else:
         return f
 
@@ -25,3 +26,11 @@ def radian_to_degree(rads: float) -> float:
 def degree_to_radian(degrees: float) -> float:
     return degrees * TO_RADIANS
 
+
+def function_memory_bytes() -> Optional[int]:
+    """
+    Memory of the Lambda function this runs in, as set by the runtime (and
+    sam local). None outside Lambda.
+    """
+    memory_mb = os.getenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    return int(memory_mb) * 1024 * 1024 if memory_mb else None
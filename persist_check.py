@@ -0,0 +1,126 @@
+"""
+Checks RampBase.persist against DynamoDB Local or moto.
+
+Renders a small kicker and persists it twice: once normally, checking the
+record read back from DynamoDB matches the stats persist returned, and once
+with an upload that fails, checking the upload's error is raised and the
+record written alongside it is deleted again. S3 is replaced by benchmark.LocalS3, DynamoDB is the real API.
+
+docker-compose up -d
+DYNAMODB_ENDPOINT_URL=http://localhost:8000 python persist_check.py
+
+python persist_check.py --moto       # in process, needs `pip install moto`
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "kicker"))
+
+import aws  # noqa: E402
+import ramp_base  # noqa: E402
+from benchmark import LocalS3  # noqa: E402
+from kicker import Kicker, KickerConfig  # noqa: E402
+
+TABLE_NAME = "Kicker"
+
+
+class FailingS3(LocalS3):
+    def put_object(self, **kwargs):
+        raise Exception("upload failed")
+
+
+def create_table(name: str):
+    client = aws.get_client("dynamodb")
+    if name in client.list_tables()["TableNames"]:
+        return
+    client.create_table(TableName=name, KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+                        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+                        BillingMode="PAY_PER_REQUEST")
+    client.get_waiter("table_exists").wait(TableName=name)
+
+
+def from_dynamodb(value):
+    if isinstance(value, dict):
+        return {key: from_dynamodb(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_dynamodb(item) for item in value]
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def persisted(s3, id: str):
+    """
+    Draws a kicker and persists it with s3 standing in for the S3 client.
+    Returns the kicker and the error persist raised, if any.
+    """
+    get_client = ramp_base.get_client
+    ramp_base.get_client = lambda name: s3
+    try:
+        kicker = Kicker(KickerConfig(55, height_inches=72, output_format="svg"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            kicker.draw_image()
+        try:
+            kicker.persist(id=id)
+        except Exception as e:
+            return kicker, e
+        return kicker, None
+    finally:
+        ramp_base.get_client = get_client
+
+
+def check() -> list:
+    failures = []
+    create_table(TABLE_NAME)
+    table = aws.get_table(TABLE_NAME)
+    for id in ("persist-check", "persist-check-failed-upload"):
+        table.delete_item(Key={"id": id})
+
+    kicker, error = persisted(LocalS3(), "persist-check")
+    item = table.get_item(Key={"id": "persist-check"}).get("Item")
+    expected = json.loads(json.dumps({**kicker.stats, "id": "persist-check"}))
+    if error:
+        failures.append(f"persist raised {error}")
+    elif item is None:
+        failures.append("no record was written")
+    elif from_dynamodb(item) != expected:
+        failures.append(f"record {from_dynamodb(item)} does not match the stats {expected}")
+
+    _, error = persisted(FailingS3(), "persist-check-failed-upload")
+    if str(error) != "upload failed":
+        failures.append(f"a failed upload raised {error!r} instead of its own error")
+    if table.get_item(Key={"id": "persist-check-failed-upload"}).get("Item"):
+        failures.append("the record of a failed upload was left behind")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--moto", action="store_true", help="use moto instead of DYNAMODB_ENDPOINT_URL")
+    args = parser.parse_args()
+
+    if args.moto:
+        from moto import mock_aws
+        os.environ.pop("DYNAMODB_ENDPOINT_URL", None)
+        backend = mock_aws()
+    elif aws.endpoint_url("dynamodb"):
+        backend = contextlib.nullcontext()
+    else:
+        print("Set DYNAMODB_ENDPOINT_URL to DynamoDB Local (see DEPLOY.md) or pass --moto")
+        sys.exit(2)
+
+    # DynamoDB Local and moto accept any credentials
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+    with backend:
+        failures = check()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("persist OK")
+    sys.exit(1 if failures else 0)
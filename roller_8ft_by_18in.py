@@ -1,6 +1,12 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "kicker"))
+
 from roller import RollerConfig, Roller
 
 config = RollerConfig(8 * 12.0, 18.0)
 
 roller = Roller(config)
 roller.draw_image()
+roller._save_image_local()